@@ -21,6 +21,35 @@ def load_app_config():
         return {}
 
 
+_BOT_CFG_CACHE: dict[tuple, dict] = {}
+
+
+def load_bot_config() -> dict:
+    """Load the freqtrade bot config (user_data/config.json), parsed once per file version.
+
+    The result is cached on (path, mtime, size) and shared between callers,
+    so treat it as read-only. Returns {} when the file is missing or invalid.
+    """
+    try:
+        st = os.stat(BOT_CONFIG_PATH)
+    except OSError:
+        return {}
+    key = (BOT_CONFIG_PATH, st.st_mtime_ns, st.st_size)
+    cfg = _BOT_CFG_CACHE.get(key)
+    if cfg is not None:
+        return cfg
+    try:
+        with open(BOT_CONFIG_PATH, 'r', encoding='utf-8') as f:
+            cfg = json.load(f)
+    except Exception:
+        return {}
+    if not isinstance(cfg, dict):
+        return {}
+    _BOT_CFG_CACHE.clear()
+    _BOT_CFG_CACHE[key] = cfg
+    return cfg
+
+
 def _default_app_config() -> dict:
     return {
         "api": {
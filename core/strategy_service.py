@@ -15,6 +15,14 @@ from utils.backtest_runner import run_backtest, summarize_backtest_data, build_t
 from utils.performance_store import AIPerformanceStore
 from config.settings import BOT_CONFIG_PATH, STRATEGY_DIR
 
+_STRATEGY_CLASS_RE = re.compile(
+    r"^\s*class\s+([A-Za-z_][A-Za-z0-9_]*)\s*\(.*IStrategy.*\)\s*:\s*$", re.MULTILINE
+)
+_STRATEGY_CLASS_DEF_RE = re.compile(
+    r"^(\s*class\s+)([A-Za-z_][A-Za-z0-9_]*)(\s*\(.*IStrategy.*\)\s*:\s*)$", re.MULTILINE
+)
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
 class StrategyService:
     """Service layer for strategy generation and saving operations"""
     
@@ -584,11 +592,7 @@ class StrategyService:
 
     @staticmethod
     def _extract_strategy_class_name(strategy_code: str) -> str:
-        m = re.search(
-            r"^\s*class\s+([A-Za-z_][A-Za-z0-9_]*)\s*\(.*IStrategy.*\)\s*:\s*$",
-            str(strategy_code or ""),
-            flags=re.MULTILINE,
-        )
+        m = _STRATEGY_CLASS_RE.search(str(strategy_code or ""))
         if not m:
             raise RuntimeError("Could not detect strategy class name inheriting from IStrategy")
         return str(m.group(1) or "").strip()
@@ -596,14 +600,10 @@ class StrategyService:
     @staticmethod
     def _rename_strategy_class(strategy_code: str, new_class_name: str) -> str:
         new_name = str(new_class_name or "").strip()
-        if not re.match(r"^[A-Za-z_][A-Za-z0-9_]*$", new_name):
+        if not _IDENTIFIER_RE.match(new_name):
             raise ValueError("new_class_name must be a valid Python identifier")
 
-        pat = re.compile(
-            r"^(\s*class\s+)([A-Za-z_][A-Za-z0-9_]*)(\s*\(.*IStrategy.*\)\s*:\s*)$",
-            flags=re.MULTILINE,
-        )
-        matches = list(pat.finditer(str(strategy_code or "")))
+        matches = list(_STRATEGY_CLASS_DEF_RE.finditer(str(strategy_code or "")))
         if len(matches) != 1:
             raise RuntimeError("Expected exactly one IStrategy class definition to rename")
 
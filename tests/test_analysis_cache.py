@@ -0,0 +1,73 @@
+import unittest
+
+from utils.analysis_cache import AnalysisCache, normalize_prompt
+
+
+STRATEGY = """
+class MyStrategy(IStrategy):
+    timeframe = "5m"
+
+    def populate_indicators(self, dataframe, metadata):
+        return dataframe
+"""
+
+
+class NormalizePromptTests(unittest.TestCase):
+    def test_ignores_comments_blank_lines_and_indent_width(self) -> None:
+        variant = """
+# tuned for BTC
+class MyStrategy(IStrategy):
+  timeframe = "5m"  # keep
+
+
+  def populate_indicators(self, dataframe, metadata):
+      return dataframe
+"""
+        self.assertEqual(normalize_prompt(STRATEGY), normalize_prompt(variant))
+
+    def test_keeps_block_structure(self) -> None:
+        flat = "if x:\n    a = 1\nb = 2\n"
+        nested = "if x:\n    a = 1\n    b = 2\n"
+        self.assertNotEqual(normalize_prompt(flat), normalize_prompt(nested))
+
+    def test_non_python_text_collapses_whitespace(self) -> None:
+        self.assertEqual(normalize_prompt("profit   was\n\n (low"), "profit was (low")
+
+    def test_non_string_is_empty(self) -> None:
+        self.assertEqual(normalize_prompt(None), "")
+
+
+class AnalysisCacheTests(unittest.TestCase):
+    def test_exact_hit_and_miss(self) -> None:
+        cache = AnalysisCache()
+        cache.put(STRATEGY, "analysis")
+        self.assertEqual(cache.get(STRATEGY.replace("    ", "  ")), "analysis")
+        self.assertIsNone(cache.get(STRATEGY + "\nx = 1\n"))
+
+    def test_blank_responses_are_not_stored(self) -> None:
+        cache = AnalysisCache()
+        cache.put(STRATEGY, "   ")
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.get(STRATEGY))
+
+    def test_evicts_least_recently_used(self) -> None:
+        cache = AnalysisCache(max_entries=2)
+        cache.put("a = 1", "A")
+        cache.put("b = 2", "B")
+        self.assertEqual(cache.get("a = 1"), "A")
+        cache.put("c = 3", "C")
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b = 2"))
+        self.assertEqual(cache.get("a = 1"), "A")
+        self.assertEqual(cache.get("c = 3"), "C")
+
+    def test_clear(self) -> None:
+        cache = AnalysisCache()
+        cache.put(STRATEGY, "analysis")
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.get(STRATEGY))
+
+
+if __name__ == "__main__":
+    unittest.main()
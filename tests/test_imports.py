@@ -8,6 +8,8 @@ class ImportTests(unittest.TestCase):
 
     def test_import_modules(self) -> None:
         importlib.import_module("api.client")
+        importlib.import_module("utils.analysis_cache")
+        importlib.import_module("utils.json_codec")
         importlib.import_module("core.strategy_service")
         importlib.import_module("utils.knowledge_base")
         importlib.import_module("utils.ollama_client")
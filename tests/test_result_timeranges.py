@@ -0,0 +1,25 @@
+import os
+import unittest
+
+from utils import backtest_runner
+from utils.backtest_runner import _result_timeranges_parsed, _result_timeranges_streamed, read_result_timeranges
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "backtest_result.json")
+EXPECTED = {"20240101-20240301", "20240105-20240301"}
+
+
+class ResultTimerangeTests(unittest.TestCase):
+    def test_parsed_reads_top_level_and_metadata_only(self) -> None:
+        self.assertEqual(_result_timeranges_parsed(FIXTURE), EXPECTED)
+
+    @unittest.skipIf(backtest_runner.ijson is None, "ijson is not installed")
+    def test_streamed_matches_parsed(self) -> None:
+        self.assertEqual(_result_timeranges_streamed(FIXTURE), _result_timeranges_parsed(FIXTURE))
+
+    def test_read_result_timeranges(self) -> None:
+        self.assertEqual(read_result_timeranges(FIXTURE), EXPECTED)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,66 +1,357 @@
 """
 AI Analysis tab for strategy insights and loss analysis
 """
+import io
 import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from queue import Empty, SimpleQueue
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import cached_property, lru_cache, partial
+from itertools import islice
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QPushButton, QTextEdit, QTabWidget, QScrollArea, QCheckBox, QSpinBox, QMessageBox, QGroupBox, QLineEdit, QApplication)
-from PyQt6.QtCore import Qt, QThreadPool
+                             QPushButton, QTextEdit, QPlainTextEdit, QTabWidget, QScrollArea, QCheckBox, QSpinBox, QMessageBox, QGroupBox, QLineEdit, QApplication)
+from PyQt6.QtCore import Qt, QThreadPool, QTimer
+from PyQt6.QtGui import QTextCursor
 from utils.ollama_client import OllamaClient
 from config.settings import OLLAMA_BASE_URL, OLLAMA_MODEL_ANALYSIS, OLLAMA_OPTIONS, BOT_CONFIG_PATH
 
-from utils.qt_worker import Worker
-from utils.backtest_runner import run_backtest, summarize_backtest_data, build_trade_forensics
+from utils.qt_worker import Worker, WorkerSignals
+from utils import json_codec
+from utils.analysis_cache import AnalysisCache
+from utils.backtest_runner import run_backtest, run_backtest_summary, summarize_backtest_data, build_trade_forensics
 from core.strategy_service import StrategyService
 
+_METRIC_KEYS = (
+    "profit_total_pct",
+    "profit_total_abs",
+    "max_drawdown_pct",
+    "max_drawdown",
+    "winrate",
+    "win_rate",
+    "sharpe",
+    "sharpe_ratio",
+    "sortino",
+    "calmar",
+    "total_trades",
+    "trade_count",
+)
+_METRIC_KEYS_SET = frozenset(_METRIC_KEYS)
+_EMPTY_METRICS_ROW = (None,) * len(_METRIC_KEYS)
+
+# Section separators for the results pane; each starts a new paragraph.
+SEP_EQ = "\n\n" + "=" * 60 + "\n"
+SEP_DASH = "\n\n" + "-" * 60 + "\n"
+SEP_DASH_SHORT = "\n\n" + "-" * 40 + "\n"
+
+# Refinement iterations rendered in the results pane; the rest are summarized.
+MAX_DISPLAY_ITERS = 20
+
+
+@dataclass(slots=True)
+class _AnalyzeCtx:
+    """Inputs of one analyze_strategy run, handed to the pool worker."""
+
+    strategy_code: str
+    refine_iters: int = 0
+    scenarios_raw: str = ""
+
+
+def _flatten_metrics(summary: dict | None) -> tuple:
+    """Backtest summary metrics as a row aligned with _METRIC_KEYS (None where absent)."""
+    m = summary.get("metrics") if isinstance(summary, dict) else None
+    if not isinstance(m, dict) or _METRIC_KEYS_SET.isdisjoint(m):
+        return _EMPTY_METRICS_ROW
+    return tuple(m.get(k) for k in _METRIC_KEYS)
+
+
+_RUN_STRATEGY = 1
+_RUN_LOSS_FETCH = 2
+_RUN_LOSS_ANALYZE = 4
+_RUN_IMPROVE = 8
+
+_VALIDATE_CACHE_SIZE = 16
+_STREAM_DRAIN_INTERVAL_MS = 30
+_STREAM_DRAIN_BATCH = 32
+_CODE_CHANGE_ATTRS = {
+    "analysis": "_last_code_change_analysis",
+    "improve": "_last_code_change_improve",
+}
+_CANDLE_SNAPSHOT_ROWS = 60
+_LOSS_TRADE_FIELDS = ("pair", "enter_price", "exit_price", "profit_pct", "duration")
+_CANDLE_COLUMNS = ("date", "open", "high", "low", "close", "volume")
+
+
+def _set_plain_text(widget, text: str) -> None:
+    """Replace an editor's contents with plain text (never parsed as rich text).
+
+    Used for model output and strategy source, which can be large; the
+    widget's own signals are held while the document is rebuilt.
+    """
+    blocked = widget.blockSignals(True)
+    try:
+        widget.setPlainText(text)
+    finally:
+        widget.blockSignals(blocked)
+
+
+def _tail(x, n: int) -> str:
+    """Last ``n`` characters of process output, slicing before any conversion."""
+    if x is None:
+        return ""
+    if isinstance(x, (bytes, bytearray)):
+        return bytes(x[-n:]).decode("utf-8", "replace")
+    if isinstance(x, str):
+        return x[-n:]
+    return str(x)[-n:]
+
+
+@lru_cache(maxsize=32)
+def _parse_code_change(text: str) -> str | None:
+    """Code after the CODE_CHANGE: marker in a model response, without markdown fences."""
+    if not isinstance(text, str) or not text or text.isspace():
+        return None
+
+    marker = "CODE_CHANGE:"
+    idx = text.find(marker)
+    if idx == -1:
+        return None
+
+    code = text[idx + len(marker) :].strip()
+    if not code:
+        return None
+
+    # Strip accidental markdown fences if the model outputs them.
+    if code.startswith("```"):
+        lines = code.splitlines()
+        # remove first fence line
+        lines = lines[1:]
+        # remove trailing fence if present
+        if lines and lines[-1].strip().startswith("```"):
+            lines = lines[:-1]
+        code = "\n".join(lines).strip()
+
+    return code or None
+
+
+def _compact_candles(candles):
+    """Trim a pair_candles response to the last OHLCV rows before it goes into a prompt."""
+    if isinstance(candles, dict):
+        columns = candles.get("columns")
+        rows = candles.get("data")
+        if isinstance(columns, list) and isinstance(rows, list):
+            keep = [i for i, c in enumerate(columns) if c in _CANDLE_COLUMNS]
+            return {
+                "columns": [columns[i] for i in keep],
+                "data": [
+                    [row[i] for i in keep if i < len(row)]
+                    for row in rows[-_CANDLE_SNAPSHOT_ROWS:]
+                    if isinstance(row, list)
+                ],
+            }
+        return candles
+    if isinstance(candles, list):
+        return [
+            {k: row.get(k) for k in _CANDLE_COLUMNS if k in row} if isinstance(row, dict) else row
+            for row in candles[-_CANDLE_SNAPSHOT_ROWS:]
+        ]
+    return candles
+
+
 class AIAnalysisTab(QWidget):
     """AI Analysis tab"""
     def __init__(self, client, threadpool: QThreadPool, parent=None):
         super().__init__(parent)
         self.client = client
         self.threadpool = threadpool
-        self.strategy_service = StrategyService()
-        self.ollama_client = OllamaClient(base_url=OLLAMA_BASE_URL, model=OLLAMA_MODEL_ANALYSIS, options=OLLAMA_OPTIONS)
-        self._strategy_analyze_running = False
-        self._loss_fetch_running = False
-        self._loss_analyze_running = False
-        self._improve_running = False
+        self._clipboard = QApplication.clipboard()
+        # strategy_service / ollama_client are built on first use; settings
+        # that arrive earlier are kept here and applied at construction.
+        self._pending_ollama_settings: dict | None = None
+        # One bit per re-entrancy guarded action (_RUN_*).
+        self._running_mask = 0
         self._codechange_bt_running = False
+        # Sub-tab ("analysis" / "improve") whose CODE_CHANGE is being backtested.
+        self._codechange_bt_kind: str | None = None
         self._last_run_id_for_feedback = None
+        self.trade_history: list | None = None
+        self.lbl_feedback_target: QLabel | None = None
+        self.btn_submit_feedback: QPushButton | None = None
+        self._last_code_change_analysis = None
+        self._last_code_change_improve = None
+        # Per sub-tab (apply, copy, save, backtest) buttons, registered as each tab is built.
+        self._code_change_buttons: dict[str, tuple[QPushButton, QPushButton, QPushButton, QPushButton]] = {}
 
         self._last_baseline_strategy_code = None
         self._last_baseline_bt_summary = None
+        self._last_baseline_metrics = _flatten_metrics(None)
+        self._validate_cache: OrderedDict[str, tuple[bool, str]] = OrderedDict()
+        # Baseline and candidate backtests run side by side on their own two
+        # threads so they neither serialize nor hold QThreadPool slots; each
+        # one only waits on its freqtrade subprocess.
+        # CODE_CHANGE backtests are tagged with a generation; bumping it
+        # cancels the in-flight run (its threading.Event) and makes its late
+        # signals no-ops.
+        self._bt_gen = 0
+        self._bt_cancel_event: threading.Event | None = None
+        self._bt_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="codechange-bt")
+        # The tab lives inside the main window's QTabWidget and never gets a
+        # closeEvent of its own, so pool teardown hangs off application quit.
+        QApplication.instance().aboutToQuit.connect(self._on_about_to_quit)
+        # Generating improvements again for the same strategy and /profit
+        # metrics returns the previous AI answer instead of another Ollama
+        # round-trip (Regenerate skips it).
+        self._analysis_cache = AnalysisCache(max_entries=64)
+        # Market context snapshot shared by back-to-back analyses (see
+        # _cached_market_context); it is read from worker threads.
+        self._mc_cache: tuple[float, dict] | None = None
+        self._mc_lock = threading.Lock()
+        # Runs the three independent REST lookups of _build_market_context.
+        self._mc_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="market-context")
+        self._profit_cache: tuple[float, dict] | None = None
+        self._profit_lock = threading.Lock()
+        # Scenario and refinement runs are exclusive (_RUN_STRATEGY), so each
+        # kind reuses one signals object wired to its bound handlers.
+        self._scenarios_signals = WorkerSignals()
+        self._scenarios_signals.result.connect(self._on_scenarios_result)
+        self._scenarios_signals.error.connect(self._on_strategy_error)
+        self._scenarios_signals.finished.connect(self._on_strategy_finished)
+        self._refine_signals = WorkerSignals()
+        self._refine_signals.result.connect(self._on_refine_result)
+        self._refine_signals.error.connect(self._on_strategy_error)
+        self._refine_signals.finished.connect(self._on_strategy_finished)
+        self._shown_once = False
         self.setup_ui()
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        # The connection check is what first builds ollama_client, so it waits
+        # for the tab to be opened instead of running during startup.
+        if not self._shown_once:
+            self._shown_once = True
+            self.check_ollama_connection()
+
+    def _on_about_to_quit(self) -> None:
+        # Stop running freqtrade subprocesses first; the executor's threads
+        # are joined at interpreter exit and would otherwise wait them out.
+        self._cancel_codechange_backtest()
+        self._bt_executor.shutdown(wait=False, cancel_futures=True)
+        self._mc_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _set_running(self, bit: int, on: bool, btn) -> None:
+        if on:
+            self._running_mask |= bit
+        else:
+            self._running_mask &= ~bit
+        btn.setEnabled(not on)
+
+    def _cancel_codechange_backtest(self) -> None:
+        was_running = self._codechange_bt_running
+        self._bt_gen += 1
+        if self._bt_cancel_event is not None:
+            self._bt_cancel_event.set()
+            self._bt_cancel_event = None
+        self._codechange_bt_running = False
+        self._codechange_bt_kind = None
+        if was_running:
+            for kind in self._code_change_buttons:
+                self._refresh_code_change_actions(kind)
+
+    def _begin_codechange_backtest(self, kind: str) -> tuple[int, threading.Event]:
+        self._cancel_codechange_backtest()
+        self._codechange_bt_running = True
+        self._codechange_bt_kind = kind
+        self._bt_cancel_event = threading.Event()
+        return self._bt_gen, self._bt_cancel_event
+
     def _set_last_run_id_for_feedback(self, run_id):
         if isinstance(run_id, int) and run_id > 0:
             self._last_run_id_for_feedback = run_id
-            if hasattr(self, "lbl_feedback_target"):
+            if self.lbl_feedback_target is not None:
                 self.lbl_feedback_target.setText(f"Last run id: {run_id}")
-            if hasattr(self, "btn_submit_feedback"):
+            if self.btn_submit_feedback is not None:
                 self.btn_submit_feedback.setEnabled(True)
             return
 
         self._last_run_id_for_feedback = None
-        if hasattr(self, "lbl_feedback_target"):
+        if self.lbl_feedback_target is not None:
             self.lbl_feedback_target.setText("Last run id: (none)")
-        if hasattr(self, "btn_submit_feedback"):
+        if self.btn_submit_feedback is not None:
             self.btn_submit_feedback.setEnabled(False)
 
-    def update_ollama_settings(self, base_url: str, model: str, options=None, task_models=None) -> None:
+    @cached_property
+    def strategy_service(self) -> StrategyService:
+        service = StrategyService()
+        if self._pending_ollama_settings is not None:
+            service.update_ollama_settings(**self._pending_ollama_settings)
+        return service
+
+    @cached_property
+    def ollama_client(self) -> OllamaClient:
+        client = OllamaClient(base_url=OLLAMA_BASE_URL, model=OLLAMA_MODEL_ANALYSIS, options=OLLAMA_OPTIONS)
+        if self._pending_ollama_settings is not None:
+            self._apply_analysis_client_settings(client, **self._pending_ollama_settings)
+        return client
+
+    @staticmethod
+    def _apply_analysis_client_settings(client: OllamaClient, base_url: str, model: str, options=None, task_models=None) -> None:
         analysis_model = model
         if isinstance(task_models, dict):
             analysis_model = str(task_models.get("strategy_analysis") or analysis_model)
+        client.update_settings(base_url=base_url, model=analysis_model, options=options)
 
-        self.ollama_client.update_settings(base_url=base_url, model=analysis_model, options=options)
-        self.strategy_service.update_ollama_settings(base_url=base_url, model=model, options=options, task_models=task_models)
-        self.lbl_ollama_status.setText("Checking Ollama connection...")
-        self.lbl_ollama_status.setStyleSheet("font-weight: bold; color: orange;")
-        self.check_ollama_connection()
+    def update_ollama_settings(self, base_url: str, model: str, options=None, task_models=None) -> None:
+        self._pending_ollama_settings = {
+            "base_url": base_url,
+            "model": model,
+            "options": options,
+            "task_models": task_models,
+        }
+        # Only touch clients that already exist; cached_property stores them in __dict__.
+        if "ollama_client" in self.__dict__:
+            self._apply_analysis_client_settings(self.ollama_client, **self._pending_ollama_settings)
+        if "strategy_service" in self.__dict__:
+            self.strategy_service.update_ollama_settings(**self._pending_ollama_settings)
+        if self._shown_once:
+            self.lbl_ollama_status.setText("Checking Ollama connection...")
+            self.lbl_ollama_status.setStyleSheet("font-weight: bold; color: orange;")
+            self.check_ollama_connection()
+
+    def _cached_market_context(self, ttl: float = 5.0) -> dict:
+        """Return the market context, reusing a snapshot younger than ``ttl`` seconds."""
+        with self._mc_lock:
+            cached = self._mc_cache
+            if cached is not None and time.monotonic() - cached[0] < ttl:
+                return dict(cached[1])
+            ctx = self._build_market_context()
+            self._mc_cache = (time.monotonic(), ctx)
+            return dict(ctx)
+
+    def _get_profit_cached(self, ttl: float = 10.0):
+        """/profit response, reused for ``ttl`` seconds across the loss and improvement actions."""
+        with self._profit_lock:
+            cached = self._profit_cache
+            if cached is not None and time.monotonic() - cached[0] < ttl:
+                return dict(cached[1])
+            profit_data = self.client.get_profit()
+            if isinstance(profit_data, dict):
+                self._profit_cache = (time.monotonic(), profit_data)
+                return dict(profit_data)
+            return profit_data
 
     def _build_market_context(self) -> dict:
         ctx = {}
+        # The three lookups are independent; issue them concurrently and only
+        # then fetch candles, which need the timeframe and a pair. A lookup
+        # that has not answered within 5 s is reported like a failed one.
+        f_cfg = self._mc_executor.submit(self.client.get_config)
+        f_wl = self._mc_executor.submit(self.client.get_whitelist)
+        f_ot = self._mc_executor.submit(self.client.get_open_trades)
+
         try:
-            cfg = self.client.get_config()
+            cfg = f_cfg.result(timeout=5)
             if isinstance(cfg, dict):
                 ctx["bot_config"] = {
                     "strategy": cfg.get("strategy"),
@@ -72,14 +363,14 @@ class AIAnalysisTab(QWidget):
             ctx["bot_config_error"] = "failed to fetch show_config"
 
         try:
-            wl = self.client.get_whitelist()
+            wl = f_wl.result(timeout=5)
             if isinstance(wl, list):
                 ctx["whitelist"] = wl[:30]
         except Exception:
             ctx["whitelist_error"] = "failed to fetch whitelist"
 
         try:
-            open_trades = self.client.get_open_trades()
+            open_trades = f_ot.result(timeout=5)
             if isinstance(open_trades, list):
                 ctx["open_trades"] = open_trades[:10]
         except Exception:
@@ -105,12 +396,12 @@ class AIAnalysisTab(QWidget):
                 tf = bot_cfg.get("timeframe")
 
             if pair and tf:
-                candles = self.client.get_pair_candles(pair=str(pair), timeframe=str(tf), limit=120)
+                candles = self.client.get_pair_candles(pair=str(pair), timeframe=str(tf), limit=_CANDLE_SNAPSHOT_ROWS)
                 if candles is not None:
                     ctx["pair_candles_snapshot"] = {
                         "pair": str(pair),
                         "timeframe": str(tf),
-                        "data": candles,
+                        "data": _compact_candles(candles),
                     }
         except Exception:
             ctx["pair_candles_error"] = "failed to fetch pair_candles"
@@ -118,37 +409,29 @@ class AIAnalysisTab(QWidget):
         return ctx
 
     def _extract_code_change(self, text: str) -> str | None:
-        if not isinstance(text, str) or not text.strip():
-            return None
-
-        marker = "CODE_CHANGE:"
-        idx = text.find(marker)
-        if idx == -1:
-            return None
-
-        code = text[idx + len(marker) :].strip()
-        if not code:
+        # Rendering and the Apply/Copy/Save/Backtest actions re-extract from the same output.
+        if not isinstance(text, str):
             return None
-
-        # Strip accidental markdown fences if the model outputs them.
-        if code.startswith("```"):
-            lines = code.splitlines()
-            # remove first fence line
-            lines = lines[1:]
-            # remove trailing fence if present
-            if lines and lines[-1].strip().startswith("```"):
-                lines = lines[:-1]
-            code = "\n".join(lines).strip()
-
-        return code if code.strip() else None
+        return _parse_code_change(text)
 
     def _validate_strategy_code(self, code: str) -> tuple[bool, str]:
+        # Apply/Copy/Save/Backtest all validate the same CODE_CHANGE; parse it once.
+        cached = self._validate_cache.get(code)
+        if cached is not None:
+            self._validate_cache.move_to_end(code)
+            return cached
+
         try:
             ok, err = self.strategy_service.generator.validate_strategy_code(code)
-            return bool(ok), str(err or "")
+            result = (bool(ok), str(err or ""))
         except Exception as e:
             return False, str(e)
 
+        self._validate_cache[code] = result
+        if len(self._validate_cache) > _VALIDATE_CACHE_SIZE:
+            self._validate_cache.popitem(last=False)
+        return result
+
     def _apply_code_change_to_editor(self, code: str, target: str) -> None:
         ok, err = self._validate_strategy_code(code)
         if not ok:
@@ -156,18 +439,15 @@ class AIAnalysisTab(QWidget):
             return
 
         if target == "analysis_input":
-            self.txt_strategy_input.setText(code)
+            _set_plain_text(self.txt_strategy_input, code)
         elif target == "improve_current":
-            self.txt_current_strategy.setText(code)
+            _set_plain_text(self.txt_current_strategy, code)
         elif target == "improve_output":
-            self.txt_improved_strategy.setText(code)
+            _set_plain_text(self.txt_improved_strategy, code)
 
     def _copy_to_clipboard(self, text: str) -> None:
-        if not isinstance(text, str):
-            return
-        cb = QApplication.clipboard()
-        if cb is not None:
-            cb.setText(text)
+        if isinstance(text, str) and self._clipboard is not None:
+            self._clipboard.setText(text)
 
     def _save_code_change_async(self, code: str) -> None:
         ok, err = self._validate_strategy_code(code)
@@ -196,52 +476,174 @@ class AIAnalysisTab(QWidget):
         worker.signals.error.connect(_on_error)
         self.threadpool.start(worker)
 
-    def _format_bt_compare(self, baseline_summary: dict | None, candidate_summary: dict | None) -> str:
-        def _extract_metrics(summary: dict | None) -> dict:
-            if not isinstance(summary, dict):
-                return {}
-            m = summary.get("metrics")
-            return m if isinstance(m, dict) else {}
-
-        b = _extract_metrics(baseline_summary)
-        c = _extract_metrics(candidate_summary)
-
-        keys = [
-            "profit_total_pct",
-            "profit_total_abs",
-            "max_drawdown_pct",
-            "max_drawdown",
-            "winrate",
-            "win_rate",
-            "sharpe",
-            "sharpe_ratio",
-            "sortino",
-            "calmar",
-            "total_trades",
-            "trade_count",
-        ]
-
+    def _format_bt_compare(self, baseline_row: tuple, candidate_row: tuple) -> str:
         lines = []
         lines.append("CODE_CHANGE_BACKTEST_COMPARE:")
         lines.append("metric | baseline | code_change")
         lines.append("---|---|---")
 
-        seen = set()
-        for k in keys:
-            if k in seen:
-                continue
-            seen.add(k)
-            bv = b.get(k)
-            cv = c.get(k)
-            if bv is None and cv is None:
-                continue
-            lines.append(f"{k} | {bv} | {cv}")
-
-        if len(lines) == 3:
+        present = False
+        if baseline_row is not _EMPTY_METRICS_ROW or candidate_row is not _EMPTY_METRICS_ROW:
+            for k, bv, cv in zip(_METRIC_KEYS, baseline_row, candidate_row):
+                if bv is None and cv is None:
+                    continue
+                present = True
+                lines.append(f"{k} | {bv} | {cv}")
+
+        if not present:
             lines.append("(no comparable metrics found in backtest summaries)")
 
         return "\n".join(lines)
         
+    def _refresh_code_change_actions(self, kind: str) -> None:
+        buttons = self._code_change_buttons.get(kind)
+        if buttons is None:
+            return
+        code = getattr(self, _CODE_CHANGE_ATTRS[kind])
+        has = isinstance(code, str) and bool(code) and not code.isspace()
+        btn_apply, btn_copy, btn_save, btn_backtest = buttons
+        btn_apply.setEnabled(has)
+        btn_copy.setEnabled(has)
+        btn_save.setEnabled(has)
+        if kind == "analysis":
+            btn_backtest.setEnabled(has and isinstance(self._last_baseline_bt_summary, dict))
+        else:
+            btn_backtest.setEnabled(has and not self._codechange_bt_running)
+
+    def _on_apply_code_change(self, target_attr: str, editor_targets: tuple[str, ...]) -> None:
+        code = getattr(self, target_attr)
+        if isinstance(code, str):
+            for target in editor_targets:
+                self._apply_code_change_to_editor(code, target=target)
+
+    def _on_copy_code_change(self, target_attr: str) -> None:
+        code = getattr(self, target_attr)
+        if isinstance(code, str):
+            self._copy_to_clipboard(code)
+
+    def _on_save_code_change(self, target_attr: str) -> None:
+        code = getattr(self, target_attr)
+        if isinstance(code, str):
+            self._save_code_change_async(code)
+
+    def _codechange_bt_handlers(self, gen: int, target: str):
+        """Error/finished handlers shared by both CODE_CHANGE backtest flows."""
+        pane = self.txt_analysis_results if target == "analysis" else self.txt_improved_strategy
+
+        def on_error(msg: str):
+            if gen != self._bt_gen:
+                return
+            pane.appendPlainText("\nBacktest error: " + str(msg))
+
+        def on_finished():
+            if gen != self._bt_gen:
+                return
+            self._codechange_bt_running = False
+            self._codechange_bt_kind = None
+            self._bt_cancel_event = None
+            self._refresh_code_change_actions(target)
+
+        return on_error, on_finished
+
+    def _on_backtest_analysis_code_change(self) -> None:
+        if self._codechange_bt_running:
+            return
+        code = self._last_code_change_analysis
+        if not isinstance(code, str) or not code or code.isspace():
+            return
+        if not isinstance(self._last_baseline_bt_summary, dict):
+            QMessageBox.warning(self, "Backtest", "No baseline backtest summary available. Run analysis first.")
+            return
+
+        candidate = self._last_code_change_analysis
+        ok, err = self._validate_strategy_code(candidate)
+        if not ok:
+            QMessageBox.critical(self, "Invalid code", f"CODE_CHANGE is not a valid AIStrategy: {err}")
+            return
+
+        gen, cancel_evt = self._begin_codechange_backtest("analysis")
+        self.btn_backtest_code_change.setEnabled(False)
+        self.txt_analysis_results.appendPlainText("\nRunning backtest for CODE_CHANGE... (this may take a while)")
+
+        def _run_candidate_bt():
+            bt_result = run_backtest(strategy_code=candidate, config_path=BOT_CONFIG_PATH, cancel_event=cancel_evt)
+            if not isinstance(bt_result, dict):
+                raise RuntimeError("Invalid backtest result")
+            data = bt_result.get("data")
+            if not isinstance(data, dict):
+                raise RuntimeError("Backtest output missing JSON data")
+            return summarize_backtest_data(data)
+
+        worker_bt = Worker(_run_candidate_bt)
+
+        def _on_result(summary: dict):
+            if gen != self._bt_gen:
+                return
+            compare = self._format_bt_compare(self._last_baseline_metrics, _flatten_metrics(summary))
+            self.txt_analysis_results.appendPlainText("\n" + ("=" * 60) + "\n" + compare)
+
+        _on_error, _on_finished = self._codechange_bt_handlers(gen, "analysis")
+
+        worker_bt.signals.result.connect(_on_result)
+        worker_bt.signals.error.connect(_on_error)
+        worker_bt.signals.finished.connect(_on_finished)
+        self.threadpool.start(worker_bt)
+
+    def _on_backtest_improve_code_change(self) -> None:
+        if self._codechange_bt_running:
+            return
+        code = self._last_code_change_improve
+        if not isinstance(code, str) or not code or code.isspace():
+            return
+
+        baseline_code = self.txt_current_strategy.toPlainText()
+        candidate_code = self._last_code_change_improve
+
+        ok1, err1 = self._validate_strategy_code(baseline_code)
+        if not ok1:
+            QMessageBox.critical(self, "Invalid code", f"Current strategy is not a valid AIStrategy: {err1}")
+            return
+        ok2, err2 = self._validate_strategy_code(candidate_code)
+        if not ok2:
+            QMessageBox.critical(self, "Invalid code", f"CODE_CHANGE is not a valid AIStrategy: {err2}")
+            return
+
+        gen, cancel_evt = self._begin_codechange_backtest("improve")
+        self.btn_backtest_improved_code.setEnabled(False)
+        self.txt_improved_strategy.appendPlainText("\nRunning baseline + CODE_CHANGE backtests... (this may take a while)")
+
+        def _run_both():
+            fut_base = self._bt_executor.submit(run_backtest_summary, baseline_code, BOT_CONFIG_PATH, cancel_evt)
+            fut_cand = self._bt_executor.submit(run_backtest_summary, candidate_code, BOT_CONFIG_PATH, cancel_evt)
+            wait([fut_base, fut_cand])
+            try:
+                base_summary = fut_base.result()
+            except Exception as e:
+                raise RuntimeError(f"Baseline backtest failed: {e}")
+            try:
+                cand_summary = fut_cand.result()
+            except Exception as e:
+                raise RuntimeError(f"CODE_CHANGE backtest failed: {e}")
+
+            return {"baseline": base_summary, "candidate": cand_summary}
+
+        worker_bt = Worker(_run_both)
+
+        def _on_result(payload: dict):
+            if gen != self._bt_gen:
+                return
+            base = payload.get("baseline") if isinstance(payload, dict) else None
+            cand = payload.get("candidate") if isinstance(payload, dict) else None
+            compare = self._format_bt_compare(_flatten_metrics(base), _flatten_metrics(cand))
+            self.txt_improved_strategy.appendPlainText("\n" + ("=" * 60) + "\n" + compare)
+
+        _on_error, _on_finished = self._codechange_bt_handlers(gen, "improve")
+
+        worker_bt.signals.result.connect(_on_result)
+        worker_bt.signals.error.connect(_on_error)
+        worker_bt.signals.finished.connect(_on_finished)
+        self.threadpool.start(worker_bt)
+
     def setup_ui(self):
         layout = QVBoxLayout()
         
@@ -254,20 +656,39 @@ class AIAnalysisTab(QWidget):
         self.analysis_tabs = QTabWidget()
         
         # Strategy Analysis Tab
-        self.create_strategy_analysis_tab()
-        
-        # Loss Analysis Tab
-        self.create_loss_analysis_tab()
+        self.analysis_tabs.addTab(self.create_strategy_analysis_tab(), "Strategy Analysis")
         
-        # Strategy Improvement Tab
-        self.create_improvement_tab()
+        # Loss Analysis and Strategy Improvement tabs are built on first activation.
+        self._tab_builders = {
+            1: (self.create_loss_analysis_tab, "Loss Analysis"),
+            2: (self.create_improvement_tab, "Strategy Improvement"),
+        }
+        self._tabs_built = {0}
+        for idx, (_builder, title) in self._tab_builders.items():
+            self.analysis_tabs.insertTab(idx, QWidget(), title)
+        self.analysis_tabs.currentChanged.connect(self._on_tab_changed)
         
         layout.addWidget(self.analysis_tabs)
         self.setLayout(layout)
-        
-        # Check Ollama connection
-        self.check_ollama_connection()
     
+    def _on_tab_changed(self, idx: int) -> None:
+        if idx in self._tabs_built or idx not in self._tab_builders:
+            return
+        builder, title = self._tab_builders[idx]
+        self._tabs_built.add(idx)
+        tab = builder()
+
+        self.analysis_tabs.blockSignals(True)
+        try:
+            placeholder = self.analysis_tabs.widget(idx)
+            self.analysis_tabs.removeTab(idx)
+            self.analysis_tabs.insertTab(idx, tab, title)
+            self.analysis_tabs.setCurrentIndex(idx)
+        finally:
+            self.analysis_tabs.blockSignals(False)
+        if placeholder is not None:
+            placeholder.deleteLater()
+
     def create_strategy_analysis_tab(self):
         """Create strategy analysis sub-tab"""
         tab = QWidget()
@@ -333,7 +754,7 @@ class AIAnalysisTab(QWidget):
         lbl_results = QLabel("Analysis Results:")
         lbl_results.setStyleSheet("font-weight: bold; font-size: 14px;")
         
-        self.txt_analysis_results = QTextEdit()
+        self.txt_analysis_results = QPlainTextEdit()
         self.txt_analysis_results.setReadOnly(True)
         self.txt_analysis_results.setPlaceholderText("AI analysis will appear here...")
         
@@ -359,80 +780,18 @@ class AIAnalysisTab(QWidget):
         actions_row.addWidget(self.btn_backtest_code_change)
         layout.addLayout(actions_row)
 
-        self._last_code_change_analysis = None
-
-        def _refresh_actions():
-            has = isinstance(self._last_code_change_analysis, str) and self._last_code_change_analysis.strip()
-            self.btn_apply_code_change.setEnabled(bool(has))
-            self.btn_copy_code_change.setEnabled(bool(has))
-            self.btn_save_code_change.setEnabled(bool(has))
-            self.btn_backtest_code_change.setEnabled(bool(has) and isinstance(self._last_baseline_bt_summary, dict))
-
-        def _on_apply():
-            if isinstance(self._last_code_change_analysis, str):
-                self._apply_code_change_to_editor(self._last_code_change_analysis, target="analysis_input")
-
-        def _on_copy():
-            if isinstance(self._last_code_change_analysis, str):
-                self._copy_to_clipboard(self._last_code_change_analysis)
-
-        def _on_save():
-            if isinstance(self._last_code_change_analysis, str):
-                self._save_code_change_async(self._last_code_change_analysis)
-
-        def _on_backtest():
-            if self._codechange_bt_running:
-                return
-            if not isinstance(self._last_code_change_analysis, str) or not self._last_code_change_analysis.strip():
-                return
-            if not isinstance(self._last_baseline_bt_summary, dict):
-                QMessageBox.warning(self, "Backtest", "No baseline backtest summary available. Run analysis first.")
-                return
-
-            candidate = self._last_code_change_analysis
-            ok, err = self._validate_strategy_code(candidate)
-            if not ok:
-                QMessageBox.critical(self, "Invalid code", f"CODE_CHANGE is not a valid AIStrategy: {err}")
-                return
-
-            self._codechange_bt_running = True
-            self.btn_backtest_code_change.setEnabled(False)
-            self.txt_analysis_results.append("\nRunning backtest for CODE_CHANGE... (this may take a while)")
-
-            def _run_candidate_bt():
-                bt_result = run_backtest(strategy_code=candidate, config_path=BOT_CONFIG_PATH)
-                if not isinstance(bt_result, dict):
-                    raise RuntimeError("Invalid backtest result")
-                data = bt_result.get("data")
-                if not isinstance(data, dict):
-                    raise RuntimeError("Backtest output missing JSON data")
-                return summarize_backtest_data(data)
-
-            worker_bt = Worker(_run_candidate_bt)
-
-            def _on_result(summary: dict):
-                compare = self._format_bt_compare(self._last_baseline_bt_summary, summary)
-                self.txt_analysis_results.append("\n" + ("=" * 60) + "\n" + compare)
-
-            def _on_error(msg: str):
-                self.txt_analysis_results.append("\nBacktest error: " + str(msg))
-
-            def _on_finished():
-                self._codechange_bt_running = False
-                if hasattr(self, "_refresh_code_change_actions_analysis"):
-                    self._refresh_code_change_actions_analysis()
-
-            worker_bt.signals.result.connect(_on_result)
-            worker_bt.signals.error.connect(_on_error)
-            worker_bt.signals.finished.connect(_on_finished)
-            self.threadpool.start(worker_bt)
-
-        self.btn_apply_code_change.clicked.connect(_on_apply)
-        self.btn_copy_code_change.clicked.connect(_on_copy)
-        self.btn_save_code_change.clicked.connect(_on_save)
-        self.btn_backtest_code_change.clicked.connect(_on_backtest)
-
-        self._refresh_code_change_actions_analysis = _refresh_actions
+        self._code_change_buttons["analysis"] = (
+            self.btn_apply_code_change,
+            self.btn_copy_code_change,
+            self.btn_save_code_change,
+            self.btn_backtest_code_change,
+        )
+        self.btn_apply_code_change.clicked.connect(
+            partial(self._on_apply_code_change, "_last_code_change_analysis", ("analysis_input",))
+        )
+        self.btn_copy_code_change.clicked.connect(partial(self._on_copy_code_change, "_last_code_change_analysis"))
+        self.btn_save_code_change.clicked.connect(partial(self._on_save_code_change, "_last_code_change_analysis"))
+        self.btn_backtest_code_change.clicked.connect(self._on_backtest_analysis_code_change)
 
         feedback_group = QGroupBox("Feedback")
         feedback_layout = QHBoxLayout()
@@ -456,16 +815,34 @@ class AIAnalysisTab(QWidget):
 
             rating = int(self.spin_feedback_rating.value())
             comments = self.txt_feedback_comments.text().strip()
-            try:
-                fb_id = self.strategy_service.performance_store.record_feedback(
+            store = self.strategy_service.performance_store
+
+            def _save():
+                return store.record_feedback(
                     run_id=run_id,
                     rating=rating,
                     comments=comments or None,
                 )
+
+            worker = Worker(_save)
+
+            def _on_result(fb_id):
                 self.txt_feedback_comments.setText("")
                 QMessageBox.information(self, "Feedback", f"Feedback saved (id={fb_id}).")
-            except Exception as e:
-                QMessageBox.critical(self, "Feedback", f"Failed to save feedback: {e}")
+
+            def _on_error(msg: str):
+                QMessageBox.critical(self, "Feedback", f"Failed to save feedback: {msg}")
+
+            def _on_finished():
+                self.btn_submit_feedback.setText("Submit feedback")
+                self.btn_submit_feedback.setEnabled(self._last_run_id_for_feedback is not None)
+
+            self.btn_submit_feedback.setEnabled(False)
+            self.btn_submit_feedback.setText("Saving...")
+            worker.signals.result.connect(_on_result)
+            worker.signals.error.connect(_on_error)
+            worker.signals.finished.connect(_on_finished)
+            self.threadpool.start(worker)
 
         self.btn_submit_feedback.clicked.connect(_submit_feedback)
 
@@ -478,7 +855,7 @@ class AIAnalysisTab(QWidget):
         layout.addWidget(feedback_group)
 
         tab.setLayout(layout)
-        self.analysis_tabs.addTab(tab, "Strategy Analysis")
+        return tab
     
     def create_loss_analysis_tab(self):
         """Create loss analysis sub-tab"""
@@ -509,7 +886,7 @@ class AIAnalysisTab(QWidget):
         lbl_loss_results = QLabel("Loss Analysis:")
         lbl_loss_results.setStyleSheet("font-weight: bold; font-size: 14px;")
         
-        self.txt_loss_results = QTextEdit()
+        self.txt_loss_results = QPlainTextEdit()
         self.txt_loss_results.setReadOnly(True)
         self.txt_loss_results.setPlaceholderText("Loss analysis will appear here...")
         
@@ -517,7 +894,7 @@ class AIAnalysisTab(QWidget):
         layout.addWidget(self.txt_loss_results)
 
         tab.setLayout(layout)
-        self.analysis_tabs.addTab(tab, "Loss Analysis")
+        return tab
     
     def create_improvement_tab(self):
         """Create strategy improvement sub-tab"""
@@ -533,16 +910,23 @@ class AIAnalysisTab(QWidget):
         self.btn_improve = QPushButton("Generate improvements")
         self.btn_improve.clicked.connect(self.generate_improvements)
         self.btn_improve.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold; padding: 8px;")
+        self.btn_regenerate_improve = QPushButton("Regenerate")
+        self.btn_regenerate_improve.setToolTip("Ask the model again instead of reusing the answer for this strategy and metrics")
+        self.btn_regenerate_improve.clicked.connect(self.regenerate_improvements)
+
+        improve_row = QHBoxLayout()
+        improve_row.addWidget(self.btn_improve, 1)
+        improve_row.addWidget(self.btn_regenerate_improve)
         
         layout.addWidget(lbl_current)
         layout.addWidget(self.txt_current_strategy)
-        layout.addWidget(self.btn_improve)
+        layout.addLayout(improve_row)
         
         # Results section
         lbl_improved = QLabel("Improved Strategy:")
         lbl_improved.setStyleSheet("font-weight: bold; font-size: 14px;")
         
-        self.txt_improved_strategy = QTextEdit()
+        self.txt_improved_strategy = QPlainTextEdit()
         self.txt_improved_strategy.setPlaceholderText("Improved strategy code will appear here...")
         
         layout.addWidget(lbl_improved)
@@ -567,99 +951,30 @@ class AIAnalysisTab(QWidget):
         actions_row.addWidget(self.btn_backtest_improved_code)
         layout.addLayout(actions_row)
 
-        self._last_code_change_improve = None
-
-        def _refresh_actions():
-            has = isinstance(self._last_code_change_improve, str) and self._last_code_change_improve.strip()
-            self.btn_apply_improved_code.setEnabled(bool(has))
-            self.btn_copy_improved_code.setEnabled(bool(has))
-            self.btn_save_improved_code.setEnabled(bool(has))
-            self.btn_backtest_improved_code.setEnabled(bool(has) and not self._codechange_bt_running)
-
-        def _on_apply():
-            if isinstance(self._last_code_change_improve, str):
-                # Apply to current strategy editor (so user can iterate) and also show code-only in output.
-                self._apply_code_change_to_editor(self._last_code_change_improve, target="improve_current")
-                self._apply_code_change_to_editor(self._last_code_change_improve, target="improve_output")
-
-        def _on_copy():
-            if isinstance(self._last_code_change_improve, str):
-                self._copy_to_clipboard(self._last_code_change_improve)
-
-        def _on_save():
-            if isinstance(self._last_code_change_improve, str):
-                self._save_code_change_async(self._last_code_change_improve)
-
-        def _on_backtest():
-            if self._codechange_bt_running:
-                return
-            if not isinstance(self._last_code_change_improve, str) or not self._last_code_change_improve.strip():
-                return
-
-            baseline_code = self.txt_current_strategy.toPlainText()
-            candidate_code = self._last_code_change_improve
-
-            ok1, err1 = self._validate_strategy_code(baseline_code)
-            if not ok1:
-                QMessageBox.critical(self, "Invalid code", f"Current strategy is not a valid AIStrategy: {err1}")
-                return
-            ok2, err2 = self._validate_strategy_code(candidate_code)
-            if not ok2:
-                QMessageBox.critical(self, "Invalid code", f"CODE_CHANGE is not a valid AIStrategy: {err2}")
-                return
-
-            self._codechange_bt_running = True
-            self.btn_backtest_improved_code.setEnabled(False)
-            self.txt_improved_strategy.append("\nRunning baseline + CODE_CHANGE backtests... (this may take a while)")
-
-            def _run_both():
-                bt_base = run_backtest(strategy_code=baseline_code, config_path=BOT_CONFIG_PATH)
-                if not isinstance(bt_base, dict) or not isinstance(bt_base.get("data"), dict):
-                    raise RuntimeError("Baseline backtest output missing JSON data")
-                base_summary = summarize_backtest_data(bt_base["data"])
-
-                bt_cand = run_backtest(strategy_code=candidate_code, config_path=BOT_CONFIG_PATH)
-                if not isinstance(bt_cand, dict) or not isinstance(bt_cand.get("data"), dict):
-                    raise RuntimeError("CODE_CHANGE backtest output missing JSON data")
-                cand_summary = summarize_backtest_data(bt_cand["data"])
-
-                return {"baseline": base_summary, "candidate": cand_summary}
-
-            worker_bt = Worker(_run_both)
-
-            def _on_result(payload: dict):
-                base = payload.get("baseline") if isinstance(payload, dict) else None
-                cand = payload.get("candidate") if isinstance(payload, dict) else None
-                compare = self._format_bt_compare(base, cand)
-                self.txt_improved_strategy.append("\n" + ("=" * 60) + "\n" + compare)
-
-            def _on_error(msg: str):
-                self.txt_improved_strategy.append("\nBacktest error: " + str(msg))
-
-            def _on_finished():
-                self._codechange_bt_running = False
-                if hasattr(self, "_refresh_code_change_actions_improve"):
-                    self._refresh_code_change_actions_improve()
-
-            worker_bt.signals.result.connect(_on_result)
-            worker_bt.signals.error.connect(_on_error)
-            worker_bt.signals.finished.connect(_on_finished)
-            self.threadpool.start(worker_bt)
-
-        self.btn_apply_improved_code.clicked.connect(_on_apply)
-        self.btn_copy_improved_code.clicked.connect(_on_copy)
-        self.btn_save_improved_code.clicked.connect(_on_save)
-        self.btn_backtest_improved_code.clicked.connect(_on_backtest)
-
-        self._refresh_code_change_actions_improve = _refresh_actions
+        self._code_change_buttons["improve"] = (
+            self.btn_apply_improved_code,
+            self.btn_copy_improved_code,
+            self.btn_save_improved_code,
+            self.btn_backtest_improved_code,
+        )
+        # Apply to current strategy editor (so user can iterate) and also show code-only in output.
+        self.btn_apply_improved_code.clicked.connect(
+            partial(self._on_apply_code_change, "_last_code_change_improve", ("improve_current", "improve_output"))
+        )
+        self.btn_copy_improved_code.clicked.connect(partial(self._on_copy_code_change, "_last_code_change_improve"))
+        self.btn_save_improved_code.clicked.connect(partial(self._on_save_code_change, "_last_code_change_improve"))
+        self.btn_backtest_improved_code.clicked.connect(self._on_backtest_improve_code_change)
 
         tab.setLayout(layout)
-        self.analysis_tabs.addTab(tab, "Strategy Improvement")
+        return tab
     
     def check_ollama_connection(self):
         """Check if Ollama is available"""
+        # Resolve the lazy client on the UI thread, not inside the worker.
+        client = self.ollama_client
+
         def _fetch():
-            return self.ollama_client.is_available()
+            return client.is_available()
 
         worker = Worker(_fetch)
 
@@ -679,292 +994,338 @@ class AIAnalysisTab(QWidget):
     
     def analyze_strategy(self):
         """Analyze the current strategy"""
-        if self._strategy_analyze_running:
+        if self._running_mask & _RUN_STRATEGY:
             return
         strategy_code = self.txt_strategy_input.toPlainText()
-        if not strategy_code.strip():
-            self.txt_analysis_results.setText("Please enter strategy code to analyze.")
+        if not strategy_code or strategy_code.isspace():
+            self.txt_analysis_results.setPlainText("Please enter strategy code to analyze.")
             return
 
-        self._strategy_analyze_running = True
-        self.btn_analyze_strategy.setEnabled(False)
+        self._set_running(_RUN_STRATEGY, True, self.btn_analyze_strategy)
 
         do_refine = bool(self.chk_refine.isChecked())
         refine_iters = int(self.spin_refine_iters.value())
         do_scenarios = bool(self.chk_scenarios.isChecked())
 
+        ctx = _AnalyzeCtx(strategy_code=strategy_code, refine_iters=refine_iters)
+
         if do_scenarios:
-            raw = self.txt_scenarios.toPlainText().strip()
-            if not raw:
-                self._strategy_analyze_running = False
-                self.btn_analyze_strategy.setEnabled(True)
-                self.txt_analysis_results.setText("Scenario analysis enabled but no scenarios JSON provided.")
+            ctx.scenarios_raw = self.txt_scenarios.toPlainText().strip()
+            if not ctx.scenarios_raw:
+                self._set_running(_RUN_STRATEGY, False, self.btn_analyze_strategy)
+                self.txt_analysis_results.setPlainText("Scenario analysis enabled but no scenarios JSON provided.")
                 return
 
-            try:
-                scenarios = json.loads(raw)
-            except Exception as e:
-                self._strategy_analyze_running = False
-                self.btn_analyze_strategy.setEnabled(True)
-                self.txt_analysis_results.setText(f"Invalid scenarios JSON: {e}")
-                return
+            self.txt_analysis_results.setPlainText("Running scenario backtests... (this may take a while)")
 
-            self.txt_analysis_results.setText("Running scenario backtests... (this may take a while)")
+            self.threadpool.start(Worker(self._scenarios_worker, ctx, signals=self._scenarios_signals))
+            return
 
-            def _run_scenarios():
-                return self.strategy_service.analyze_strategy_across_scenarios(
-                    strategy_code=strategy_code,
-                    scenarios=scenarios,
-                    user_goal="",
-                    market_context=self._build_market_context(),
-                )
+        if do_refine:
+            self.txt_analysis_results.setPlainText(
+                f"Running backtest refinement ({refine_iters} iteration(s))... (this may take a while)"
+            )
 
-            worker = Worker(_run_scenarios)
-
-            def _on_result(result: dict):
-                if not isinstance(result, dict):
-                    raise RuntimeError("Invalid scenario analysis result")
-
-                analysis = result.get("analysis", "")
-                risk = result.get("risk", "")
-                store_errors = result.get("performance_store_errors", [])
-                self._set_last_run_id_for_feedback(result.get("analysis_run_id"))
-
-                parts = []
-                parts.append("Scenario analysis completed.")
-                if isinstance(analysis, str) and analysis.strip():
-                    parts.append("\n" + ("=" * 60))
-                    parts.append("Scenario analysis")
-                    parts.append(analysis.strip())
-                if isinstance(risk, str) and risk.strip():
-                    parts.append("\n" + ("-" * 60))
-                    parts.append("Scenario risk assessment")
-                    parts.append(risk.strip())
-
-                if isinstance(store_errors, list) and store_errors:
-                    parts.append("\n" + ("-" * 60))
-                    parts.append("Performance store errors:")
-                    for e in store_errors[:5]:
-                        if isinstance(e, str) and e.strip():
-                            parts.append(e.strip())
-
-                self.txt_analysis_results.setText("\n".join(parts))
+            self.threadpool.start(Worker(self._refine_worker, ctx, signals=self._refine_signals))
+            return
 
-            def _on_error(msg: str):
-                self.txt_analysis_results.setText(f"Error: {msg}")
+        self.txt_analysis_results.setPlainText("Running backtest... (this may take a while)")
 
-            def _on_finished():
-                self._strategy_analyze_running = False
-                self.btn_analyze_strategy.setEnabled(True)
+        def _run_bt():
+            return run_backtest(strategy_code=strategy_code, config_path=BOT_CONFIG_PATH)
 
-            worker.signals.result.connect(_on_result)
-            worker.signals.error.connect(_on_error)
-            worker.signals.finished.connect(_on_finished)
-            self.threadpool.start(worker)
-            return
+        worker = Worker(_run_bt)
 
-        if do_refine:
-            self.txt_analysis_results.setText(
-                f"Running backtest refinement ({refine_iters} iteration(s))... (this may take a while)"
+        def _on_result(bt_result: dict):
+            result_file = bt_result.get("result_file") if isinstance(bt_result, dict) else None
+            self.txt_analysis_results.setPlainText(
+                "Backtest finished. Sending results to AI for analysis...\n"
+                + (f"Backtest file: {result_file}\n" if result_file else "")
             )
 
-            def _run_loop():
-                return self.strategy_service.refine_strategy_with_backtest_loop(
-                    strategy_code=strategy_code,
-                    user_goal="",
-                    max_iterations=refine_iters,
-                    market_context=self._build_market_context(),
-                )
+            # Model output is streamed into the pane as it is generated; the
+            # worker only enqueues chunks and a UI-thread timer appends them
+            # in batches so layout does not run once per token.
+            stream_q: SimpleQueue = SimpleQueue()
+            stream_timer = QTimer(self)
+            stream_timer.setInterval(_STREAM_DRAIN_INTERVAL_MS)
 
-            worker = Worker(_run_loop)
-
-            def _on_result(result: dict):
-                if not isinstance(result, dict):
-                    raise RuntimeError("Invalid refinement result")
-
-                iterations = result.get("iterations", [])
-                final = result.get("final", {})
-                final_file = final.get("result_file") if isinstance(final, dict) else None
-                store_errors = result.get("performance_store_errors", [])
-
-                last_iter_run_id = None
-                if isinstance(iterations, list) and iterations:
-                    for it in iterations:
-                        rid = it.get("performance_run_id") if isinstance(it, dict) else None
-                        if isinstance(rid, int) and rid > 0:
-                            last_iter_run_id = rid
-                self._set_last_run_id_for_feedback(last_iter_run_id or (final.get("performance_run_id") if isinstance(final, dict) else None))
-
-                text_parts = []
-                text_parts.append("Refinement completed.")
-                if final_file:
-                    text_parts.append(f"Final backtest file: {final_file}")
-
-                if isinstance(iterations, list) and iterations:
-                    for it in iterations:
-                        idx = it.get("iteration")
-                        analysis = it.get("analysis", "")
-                        risk = it.get("risk", "")
-                        text_parts.append("\n" + ("=" * 60))
-                        text_parts.append(f"Iteration {idx} analysis")
-                        text_parts.append((analysis or "").strip())
-
-                        if isinstance(risk, str) and risk.strip():
-                            text_parts.append("\n" + ("-" * 40))
-                            text_parts.append(f"Iteration {idx} risk assessment")
-                            text_parts.append(risk.strip())
-
-                # Always show the final refined code at the end so user can copy/save.
-                final_code = final.get("strategy_code") if isinstance(final, dict) else None
-                if isinstance(final_code, str) and final_code.strip():
-                    text_parts.append("\n" + ("=" * 60))
-                    text_parts.append("Final refined strategy code:")
-                    text_parts.append(final_code)
-
-                if isinstance(store_errors, list) and store_errors:
-                    text_parts.append("\n" + ("-" * 60))
-                    text_parts.append("Performance store errors:")
-                    for e in store_errors[:5]:
-                        if isinstance(e, str) and e.strip():
-                            text_parts.append(e.strip())
-
-                self.txt_analysis_results.setText("\n".join(text_parts))
+            def _drain_stream():
+                batch = []
+                while len(batch) < _STREAM_DRAIN_BATCH:
+                    try:
+                        batch.append(stream_q.get_nowait())
+                    except Empty:
+                        break
+                if batch:
+                    self.txt_analysis_results.moveCursor(QTextCursor.MoveOperation.End)
+                    self.txt_analysis_results.insertPlainText("".join(batch))
 
-        else:
-            self.txt_analysis_results.setText("Running backtest... (this may take a while)")
+            stream_timer.timeout.connect(_drain_stream)
+            stream_timer.start()
+
+            def _analyze():
+                if not isinstance(bt_result, dict):
+                    raise RuntimeError("Invalid backtest result")
+                data = bt_result.get("data")
+                if not isinstance(data, dict):
+                    raise RuntimeError("Backtest output missing JSON data")
 
-            def _run_bt():
-                return run_backtest(strategy_code=strategy_code, config_path=BOT_CONFIG_PATH)
+                stdout = bt_result.get("stdout", "")
+                stderr = bt_result.get("stderr", "")
 
-            worker = Worker(_run_bt)
+                bt_summary = summarize_backtest_data(data)
+                bt_forensics = build_trade_forensics(data)
 
-            def _on_result(bt_result: dict):
-                result_file = bt_result.get("result_file") if isinstance(bt_result, dict) else None
-                self.txt_analysis_results.setText(
-                    "Backtest finished. Sending results to AI for analysis...\n"
-                    + (f"Backtest file: {result_file}\n" if result_file else "")
+                payload = {
+                    "strategy_class": bt_result.get("strategy_class"),
+                    "result_file": bt_result.get("result_file"),
+                    "stdout_tail": _tail(stdout, 2000),
+                    "stderr_tail": _tail(stderr, 2000),
+                    "backtest_summary": bt_summary,
+                    "trade_forensics": bt_forensics,
+                    "market_context": self._cached_market_context(),
+                }
+
+                text = self.ollama_client.analyze_strategy_with_backtest_contract_stream(
+                    strategy_code,
+                    payload,
+                    stream_q.put,
+                    payload_json=json_codec.dumps(payload, indent=True),
                 )
+                store_error = None
+                run_id = None
+                try:
+                    run_id = self.strategy_service.performance_store.record_run(
+                        run_type="single_backtest_analysis",
+                        strategy_code=strategy_code,
+                        user_goal=None,
+                        scenario_name=None,
+                        iteration=None,
+                        timerange=None,
+                        timeframe=None,
+                        pairs=None,
+                        result_file=str(bt_result.get("result_file") or "") or None,
+                        model_analysis=str(getattr(self.ollama_client, "model", "") or "") or None,
+                        model_risk=None,
+                        analysis_text=text,
+                        risk_text=None,
+                        backtest_summary=bt_summary,
+                        trade_forensics=bt_forensics,
+                        market_context=payload.get("market_context"),
+                        extra={
+                            "strategy_class": bt_result.get("strategy_class"),
+                            "stdout_tail": payload.get("stdout_tail"),
+                            "stderr_tail": payload.get("stderr_tail"),
+                        },
+                    )
+                except Exception as e:
+                    store_error = str(e)
+
+                return {
+                    "analysis_text": text,
+                    "performance_store_error": store_error,
+                    "performance_run_id": run_id,
+                    "baseline_bt_summary": bt_summary,
+                }
 
-                def _analyze():
-                    if not isinstance(bt_result, dict):
-                        raise RuntimeError("Invalid backtest result")
-                    data = bt_result.get("data")
-                    if not isinstance(data, dict):
-                        raise RuntimeError("Backtest output missing JSON data")
-
-                    stdout = bt_result.get("stdout", "")
-                    stderr = bt_result.get("stderr", "")
-
-                    bt_summary = summarize_backtest_data(data)
-                    bt_forensics = build_trade_forensics(data)
-
-                    payload = {
-                        "strategy_class": bt_result.get("strategy_class"),
-                        "result_file": bt_result.get("result_file"),
-                        "stdout_tail": str(stdout)[-2000:],
-                        "stderr_tail": str(stderr)[-2000:],
-                        "backtest_summary": bt_summary,
-                        "trade_forensics": bt_forensics,
-                        "market_context": self._build_market_context(),
-                    }
+            worker_ai = Worker(_analyze)
+
+            def _on_ai_result(result: dict):
+                # The complete text replaces the streamed preview.
+                stream_timer.stop()
+                if isinstance(result, dict):
+                    text = result.get("analysis_text", "")
+                    store_error = result.get("performance_store_error")
+                    self._set_last_run_id_for_feedback(result.get("performance_run_id"))
+                    out = str(text or "")
+                    store_error = store_error.strip() if isinstance(store_error, str) else ""
+                    if store_error:
+                        out = out.rstrip() + "\n\n" + ("-" * 60) + "\nPerformance store error:\n" + store_error
+                    _set_plain_text(self.txt_analysis_results, out)
+                    code_change = self._extract_code_change(out)
+                    if self._codechange_bt_kind == "analysis" and code_change != self._last_code_change_analysis:
+                        self._cancel_codechange_backtest()
+                    self._last_code_change_analysis = code_change
+                    baseline = result.get("baseline_bt_summary")
+                    if isinstance(baseline, dict):
+                        self._last_baseline_bt_summary = baseline
+                        self._last_baseline_metrics = _flatten_metrics(baseline)
+                    self._refresh_code_change_actions("analysis")
+                    return
+                self.txt_analysis_results.setPlainText(str(result))
+
+            def _on_ai_error(msg: str):
+                stream_timer.stop()
+                self.txt_analysis_results.setPlainText(f"Error: {msg}")
+
+            def _on_ai_finished():
+                stream_timer.stop()
+                stream_timer.deleteLater()
+                self._set_running(_RUN_STRATEGY, False, self.btn_analyze_strategy)
+
+            worker_ai.signals.result.connect(_on_ai_result)
+            worker_ai.signals.error.connect(_on_ai_error)
+            worker_ai.signals.finished.connect(_on_ai_finished)
+            self.threadpool.start(worker_ai)
 
-                    text = self.ollama_client.analyze_strategy_with_backtest_contract(strategy_code, payload)
-                    store_error = None
-                    run_id = None
-                    try:
-                        run_id = self.strategy_service.performance_store.record_run(
-                            run_type="single_backtest_analysis",
-                            strategy_code=strategy_code,
-                            user_goal=None,
-                            scenario_name=None,
-                            iteration=None,
-                            timerange=None,
-                            timeframe=None,
-                            pairs=None,
-                            result_file=str(bt_result.get("result_file") or "") or None,
-                            model_analysis=str(getattr(self.ollama_client, "model", "") or "") or None,
-                            model_risk=None,
-                            analysis_text=text,
-                            risk_text=None,
-                            backtest_summary=bt_summary,
-                            trade_forensics=bt_forensics,
-                            market_context=payload.get("market_context"),
-                            extra={
-                                "strategy_class": bt_result.get("strategy_class"),
-                                "stdout_tail": payload.get("stdout_tail"),
-                                "stderr_tail": payload.get("stderr_tail"),
-                            },
-                        )
-                    except Exception as e:
-                        store_error = str(e)
-
-                    return {
-                        "analysis_text": text,
-                        "performance_store_error": store_error,
-                        "performance_run_id": run_id,
-                        "baseline_bt_summary": bt_summary,
-                    }
+            return
 
-                worker_ai = Worker(_analyze)
-
-                def _on_ai_result(result: dict):
-                    if isinstance(result, dict):
-                        text = result.get("analysis_text", "")
-                        store_error = result.get("performance_store_error")
-                        self._set_last_run_id_for_feedback(result.get("performance_run_id"))
-                        out = str(text or "")
-                        if isinstance(store_error, str) and store_error.strip():
-                            out = out.rstrip() + "\n\n" + ("-" * 60) + "\nPerformance store error:\n" + store_error.strip()
-                        self.txt_analysis_results.setText(out)
-                        code_change = self._extract_code_change(out)
-                        self._last_code_change_analysis = code_change
-                        baseline = result.get("baseline_bt_summary")
-                        if isinstance(baseline, dict):
-                            self._last_baseline_bt_summary = baseline
-                        if hasattr(self, "_refresh_code_change_actions_analysis"):
-                            self._refresh_code_change_actions_analysis()
-                        return
-                    self.txt_analysis_results.setText(str(result))
-
-                def _on_ai_error(msg: str):
-                    self.txt_analysis_results.setText(f"Error: {msg}")
-
-                def _on_ai_finished():
-                    self._strategy_analyze_running = False
-                    self.btn_analyze_strategy.setEnabled(True)
-
-                worker_ai.signals.result.connect(_on_ai_result)
-                worker_ai.signals.error.connect(_on_ai_error)
-                worker_ai.signals.finished.connect(_on_ai_finished)
-                self.threadpool.start(worker_ai)
+        worker.signals.result.connect(_on_result)
+        worker.signals.error.connect(self._on_strategy_error)
+        worker.signals.finished.connect(self._on_strategy_finished)
+        self.threadpool.start(worker)
 
-                return
+    def _scenarios_worker(self, ctx: _AnalyzeCtx) -> dict:
+        # Decoded here so a large scenarios blob never stalls the UI thread.
+        try:
+            scenarios = json_codec.loads(ctx.scenarios_raw)
+        except Exception as e:
+            return {"error": f"Invalid scenarios JSON: {e}"}
 
-        def _on_error(msg: str):
-            self.txt_analysis_results.setText(f"Error: {msg}")
+        return self.strategy_service.analyze_strategy_across_scenarios(
+            strategy_code=ctx.strategy_code,
+            scenarios=scenarios,
+            user_goal="",
+            market_context=self._cached_market_context(),
+        )
 
-        def _on_finished():
-            self._strategy_analyze_running = False
-            self.btn_analyze_strategy.setEnabled(True)
+    def _on_scenarios_result(self, result: dict) -> None:
+        if not isinstance(result, dict):
+            raise RuntimeError("Invalid scenario analysis result")
+        if "error" in result:
+            self.txt_analysis_results.setPlainText(str(result["error"]))
+            return
 
-        worker.signals.result.connect(_on_result)
-        worker.signals.error.connect(_on_error)
-        worker.signals.finished.connect(_on_finished)
-        self.threadpool.start(worker)
+        analysis = result.get("analysis", "")
+        risk = result.get("risk", "")
+        store_errors = result.get("performance_store_errors", [])
+        self._set_last_run_id_for_feedback(result.get("analysis_run_id"))
+
+        analysis = analysis.strip() if isinstance(analysis, str) else ""
+        risk = risk.strip() if isinstance(risk, str) else ""
+
+        buf = io.StringIO()
+        buf.write("Scenario analysis completed.")
+        if analysis:
+            buf.write(SEP_EQ)
+            buf.write("Scenario analysis\n")
+            buf.write(analysis)
+        if risk:
+            buf.write(SEP_DASH)
+            buf.write("Scenario risk assessment\n")
+            buf.write(risk)
+
+        if isinstance(store_errors, list) and store_errors:
+            buf.write(SEP_DASH)
+            buf.write("Performance store errors:")
+            for e in store_errors[:5]:
+                e = e.strip() if isinstance(e, str) else ""
+                if e:
+                    buf.write("\n")
+                    buf.write(e)
+
+        _set_plain_text(self.txt_analysis_results, buf.getvalue())
+
+    def _refine_worker(self, ctx: _AnalyzeCtx) -> dict:
+        return self.strategy_service.refine_strategy_with_backtest_loop(
+            strategy_code=ctx.strategy_code,
+            user_goal="",
+            max_iterations=ctx.refine_iters,
+            market_context=self._cached_market_context(),
+        )
+
+    def _on_refine_result(self, result: dict) -> None:
+        if not isinstance(result, dict):
+            raise RuntimeError("Invalid refinement result")
+
+        iterations = result.get("iterations", [])
+        final = result.get("final", {})
+        final_file = final.get("result_file") if isinstance(final, dict) else None
+        store_errors = result.get("performance_store_errors", [])
+
+        last_iter_run_id = None
+        if isinstance(iterations, list) and iterations:
+            # The newest recorded iteration is the feedback target.
+            last_iter_run_id = next(
+                (
+                    it["performance_run_id"]
+                    for it in reversed(iterations)
+                    if isinstance(it, dict)
+                    and isinstance(it.get("performance_run_id"), int)
+                    and it["performance_run_id"] > 0
+                ),
+                None,
+            )
+        self._set_last_run_id_for_feedback(last_iter_run_id or (final.get("performance_run_id") if isinstance(final, dict) else None))
+
+        buf = io.StringIO()
+        buf.write("Refinement completed.")
+        if final_file:
+            buf.write(f"\nFinal backtest file: {final_file}")
+
+        if isinstance(iterations, list) and iterations:
+            for it in islice(iterations, MAX_DISPLAY_ITERS):
+                idx = it.get("iteration")
+                analysis = it.get("analysis", "")
+                risk = it.get("risk", "")
+                buf.write(SEP_EQ)
+                buf.write(f"Iteration {idx} analysis\n")
+                buf.write((analysis or "").strip())
+
+                risk = risk.strip() if isinstance(risk, str) else ""
+                if risk:
+                    buf.write(SEP_DASH_SHORT)
+                    buf.write(f"Iteration {idx} risk assessment\n")
+                    buf.write(risk)
+
+            if len(iterations) > MAX_DISPLAY_ITERS:
+                buf.write(SEP_EQ)
+                buf.write(f"... {len(iterations) - MAX_DISPLAY_ITERS} more iterations not shown")
+
+        # Always show the final refined code at the end so user can copy/save.
+        final_code = final.get("strategy_code") if isinstance(final, dict) else None
+        if isinstance(final_code, str) and final_code and not final_code.isspace():
+            buf.write(SEP_EQ)
+            buf.write("Final refined strategy code:\n")
+            buf.write(final_code)
+
+        if isinstance(store_errors, list) and store_errors:
+            buf.write(SEP_DASH)
+            buf.write("Performance store errors:")
+            for e in store_errors[:5]:
+                e = e.strip() if isinstance(e, str) else ""
+                if e:
+                    buf.write("\n")
+                    buf.write(e)
+
+        _set_plain_text(self.txt_analysis_results, buf.getvalue())
+
+    def _on_strategy_error(self, msg: str) -> None:
+        self.txt_analysis_results.setPlainText(f"Error: {msg}")
+
+    def _on_strategy_finished(self) -> None:
+        self._set_running(_RUN_STRATEGY, False, self.btn_analyze_strategy)
     
     def fetch_trades_for_analysis(self):
         """Fetch recent trades for loss analysis"""
-        if self._loss_fetch_running:
+        if self._running_mask & _RUN_LOSS_FETCH:
             return
 
-        self._loss_fetch_running = True
-        self.btn_fetch_trades.setEnabled(False)
-        self.txt_loss_results.setText("Fetching trades...")
+        self._set_running(_RUN_LOSS_FETCH, True, self.btn_fetch_trades)
+        self.txt_loss_results.setPlainText("Fetching trades...")
 
         def _fetch():
+            # Freqtrade trade rows carry dozens of keys plus order lists; keep
+            # only what the loss prompt reads.
+            trades = self.client.get_trade_history()
             return {
-                "trades": self.client.get_trade_history(),
-                "profit": self.client.get_profit(),
+                "trades": [
+                    {k: t[k] for k in _LOSS_TRADE_FIELDS if k in t}
+                    for t in trades
+                    if isinstance(t, dict)
+                ],
+                "profit": self._get_profit_cached(),
             }
 
         worker = Worker(_fetch)
@@ -979,16 +1340,15 @@ class AIAnalysisTab(QWidget):
                 if isinstance(profit_data, dict):
                     drawdown = profit_data.get('max_drawdown', 0)
                 self.lbl_drawdown.setText(f"Current Drawdown: {drawdown:.2f}%")
-                self.txt_loss_results.setText("Trades loaded. Click Analyze Losses.")
+                self.txt_loss_results.setPlainText("Trades loaded. Click Analyze Losses.")
             else:
-                self.txt_loss_results.setText("No trade history available.")
+                self.txt_loss_results.setPlainText("No trade history available.")
 
         def _on_error(msg: str):
-            self.txt_loss_results.setText(f"Error: {msg}")
+            self.txt_loss_results.setPlainText(f"Error: {msg}")
 
         def _on_finished():
-            self._loss_fetch_running = False
-            self.btn_fetch_trades.setEnabled(True)
+            self._set_running(_RUN_LOSS_FETCH, False, self.btn_fetch_trades)
 
         worker.signals.result.connect(_on_result)
         worker.signals.error.connect(_on_error)
@@ -997,69 +1357,62 @@ class AIAnalysisTab(QWidget):
     
     def analyze_losses(self):
         """Analyze recent losses"""
-        if self._loss_analyze_running:
+        if self._running_mask & _RUN_LOSS_ANALYZE:
             return
-        if not hasattr(self, 'trade_history'):
-            self.txt_loss_results.setText("Please fetch trades first using the 'Fetch Recent Trades' button.")
+        if not self.trade_history:
+            self.txt_loss_results.setPlainText("Please fetch trades first using the 'Fetch Recent Trades' button.")
             return
 
-        self._loss_analyze_running = True
-        self.btn_analyze_losses.setEnabled(False)
-        self.txt_loss_results.setText("Analyzing losses...")
+        self._set_running(_RUN_LOSS_ANALYZE, True, self.btn_analyze_losses)
+        self.txt_loss_results.setPlainText("Analyzing losses...")
 
         def _fetch_drawdown():
-            profit_data = self.client.get_profit()
+            profit_data = self._get_profit_cached()
             if isinstance(profit_data, dict):
                 return profit_data.get('max_drawdown', 0)
             return 0
 
-        def _analyze(current_drawdown: float):
-            return self.ollama_client.analyze_losses(self.trade_history, current_drawdown)
-
-        worker_drawdown = Worker(_fetch_drawdown)
+        def _analyze():
+            # Drawdown fetch and the AI call share one pool hop.
+            return self.ollama_client.analyze_losses(self.trade_history, _fetch_drawdown())
 
-        def _on_drawdown(drawdown: float):
-            worker_analysis = Worker(_analyze, drawdown)
+        def _on_result(text: str):
+            self.txt_loss_results.setPlainText(text)
 
-            def _on_result(text: str):
-                self.txt_loss_results.setText(text)
+        def _on_error(msg: str):
+            self.txt_loss_results.setPlainText(f"Error: {msg}")
 
-            def _on_error(msg: str):
-                self.txt_loss_results.setText(f"Error: {msg}")
+        def _on_finished():
+            self._set_running(_RUN_LOSS_ANALYZE, False, self.btn_analyze_losses)
 
-            def _on_finished():
-                self._loss_analyze_running = False
-                self.btn_analyze_losses.setEnabled(True)
-
-            worker_analysis.signals.result.connect(_on_result)
-            worker_analysis.signals.error.connect(_on_error)
-            worker_analysis.signals.finished.connect(_on_finished)
-            self.threadpool.start(worker_analysis)
-
-        def _on_drawdown_error(msg: str):
-            self.txt_loss_results.setText(f"Error: {msg}")
-            self._loss_analyze_running = False
-            self.btn_analyze_losses.setEnabled(True)
-
-        worker_drawdown.signals.result.connect(_on_drawdown)
-        worker_drawdown.signals.error.connect(_on_drawdown_error)
-        self.threadpool.start(worker_drawdown)
+        worker = Worker(_analyze)
+        worker.signals.result.connect(_on_result)
+        worker.signals.error.connect(_on_error)
+        worker.signals.finished.connect(_on_finished)
+        self.threadpool.start(worker)
     
     def generate_improvements(self):
         """Generate strategy improvements"""
-        if self._improve_running:
+        self._generate_improvements(use_cache=True)
+
+    def regenerate_improvements(self):
+        """Generate strategy improvements without reusing a cached answer"""
+        self._generate_improvements(use_cache=False)
+
+    def _generate_improvements(self, use_cache: bool):
+        if self._running_mask & _RUN_IMPROVE:
             return
         current_strategy = self.txt_current_strategy.toPlainText()
-        if not current_strategy.strip():
-            self.txt_improved_strategy.setText("Please enter current strategy code.")
+        if not current_strategy or current_strategy.isspace():
+            self.txt_improved_strategy.setPlainText("Please enter current strategy code.")
             return
 
-        self._improve_running = True
-        self.btn_improve.setEnabled(False)
-        self.txt_improved_strategy.setText("Generating improvements...")
+        self._set_running(_RUN_IMPROVE, True, self.btn_improve)
+        self.btn_regenerate_improve.setEnabled(False)
+        self.txt_improved_strategy.setPlainText("Generating improvements...")
 
         def _fetch_metrics():
-            profit_data = self.client.get_profit()
+            profit_data = self._get_profit_cached()
             if not isinstance(profit_data, dict):
                 raise RuntimeError("Could not retrieve performance data")
 
@@ -1074,36 +1427,35 @@ class AIAnalysisTab(QWidget):
                 'total_trades': profit_data.get('trade_count', 0)
             }
 
-        worker_metrics = Worker(_fetch_metrics)
+        def _improve():
+            # Metrics fetch, cache lookup and the AI call share one pool hop.
+            metrics = _fetch_metrics()
+            cache_text = current_strategy + "\n" + json.dumps(metrics, sort_keys=True, default=str)
+            cached = self._analysis_cache.get(cache_text) if use_cache else None
+            if cached is not None:
+                return cached
+            text = str(self.ollama_client.generate_strategy_improvements_contract(current_strategy, metrics) or "")
+            self._analysis_cache.put(cache_text, text)
+            return text
+
+        def _on_result(text: str):
+            out = str(text or "")
+            _set_plain_text(self.txt_improved_strategy, out)
+            code_change = self._extract_code_change(out)
+            if self._codechange_bt_kind == "improve" and code_change != self._last_code_change_improve:
+                self._cancel_codechange_backtest()
+            self._last_code_change_improve = code_change
+            self._refresh_code_change_actions("improve")
 
-        def _on_metrics(metrics):
-            worker_improve = Worker(self.ollama_client.generate_strategy_improvements_contract, current_strategy, metrics)
-
-            def _on_result(text: str):
-                out = str(text or "")
-                self.txt_improved_strategy.setText(out)
-                code_change = self._extract_code_change(out)
-                self._last_code_change_improve = code_change
-                if hasattr(self, "_refresh_code_change_actions_improve"):
-                    self._refresh_code_change_actions_improve()
+        def _on_error(msg: str):
+            self.txt_improved_strategy.setPlainText(f"Error: {msg}")
 
-            def _on_error(msg: str):
-                self.txt_improved_strategy.setText(f"Error: {msg}")
+        def _on_finished():
+            self._set_running(_RUN_IMPROVE, False, self.btn_improve)
+            self.btn_regenerate_improve.setEnabled(True)
 
-            def _on_finished():
-                self._improve_running = False
-                self.btn_improve.setEnabled(True)
-
-            worker_improve.signals.result.connect(_on_result)
-            worker_improve.signals.error.connect(_on_error)
-            worker_improve.signals.finished.connect(_on_finished)
-            self.threadpool.start(worker_improve)
-
-        def _on_metrics_error(msg: str):
-            self.txt_improved_strategy.setText(f"Error: {msg}")
-            self._improve_running = False
-            self.btn_improve.setEnabled(True)
-
-        worker_metrics.signals.result.connect(_on_metrics)
-        worker_metrics.signals.error.connect(_on_metrics_error)
-        self.threadpool.start(worker_metrics)
+        worker = Worker(_improve)
+        worker.signals.result.connect(_on_result)
+        worker.signals.error.connect(_on_error)
+        worker.signals.finished.connect(_on_finished)
+        self.threadpool.start(worker)
@@ -1,17 +1,62 @@
 import json
 import os
 import re
+import time
 from datetime import date, timedelta
+from pathlib import Path
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTextEdit, QLineEdit,
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QPlainTextEdit, QLineEdit,
     QFileDialog, QMessageBox, QComboBox, QDialog, QDialogButtonBox, QDateEdit,
     QListWidget, QListWidgetItem
 )
 from PyQt6.QtCore import QThreadPool, QTimer, Qt, QDate
 
-from config.settings import BOT_CONFIG_PATH, APP_CONFIG_PATH, load_app_config
-from utils.backtest_runner import run_backtest, download_data
+from config.settings import BOT_CONFIG_PATH, APP_CONFIG_PATH, load_app_config, load_bot_config
+from utils.backtest_runner import run_backtest, download_data, read_result_timeranges
 from utils.qt_worker import Worker
+from utils import json_codec
+
+_PREFS_SAVE_DEBOUNCE_MS = 500
+_PREFS_SAVE_MAX_WAIT_S = 3.0
+_TIMERANGE_RE = re.compile(r"(\d{8}-\d{8})")
+_RAW_DISPLAY_MAX_CHARS = 2_000_000
+_STRATEGY_SYNC_READ_MAX_BYTES = 256 * 1024
+
+
+def _scan_timerange_history(out_dir: str) -> set:
+    """Timeranges used by the 30 most recent result files in ``out_dir``."""
+    timeranges = set()
+    if not os.path.isdir(out_dir):
+        return timeranges
+
+    entries = []
+    with os.scandir(out_dir) as it:
+        for e in it:
+            if e.name.lower().endswith('.json'):
+                try:
+                    entries.append((e.stat().st_mtime, e.path))
+                except OSError:
+                    continue
+
+    entries.sort(reverse=True)
+    for _mtime, path in entries[:30]:
+        try:
+            timeranges.update(read_result_timeranges(path))
+        except Exception:
+            continue
+    return timeranges
+
+
+def _format_raw_payload(raw_payload: dict) -> str:
+    text = json_codec.dumps(raw_payload, indent=True)
+    if len(text) <= _RAW_DISPLAY_MAX_CHARS:
+        return text
+    where = raw_payload.get("result_file") or "the result file"
+    return (
+        text[:_RAW_DISPLAY_MAX_CHARS]
+        + f"\n\n... output truncated: showing the first {_RAW_DISPLAY_MAX_CHARS:,} of {len(text):,} characters."
+        + f"\nFull result: {where}"
+    )
 
 
 class BacktestTab(QWidget):
@@ -19,11 +64,35 @@ class BacktestTab(QWidget):
     def __init__(self, threadpool: QThreadPool, parent=None):
         super().__init__(parent)
         self.threadpool = threadpool
+        # Backtests and downloads are long freqtrade subprocess runs; they get
+        # their own pool so they never hold one of the shared pool's threads
+        # that the short jobs (history scan, JSON formatting, other tabs) use.
+        # The tab runs at most one of them at a time (_running).
+        self._job_pool = QThreadPool(self)
+        self._job_pool.setMaxThreadCount(1)
         self._running = False
         self._prefs_save_timer = QTimer(self)
         self._prefs_save_timer.setSingleShot(True)
         self._prefs_save_timer.timeout.connect(self._save_prefs_to_app_config)
         self._known_pairs = []
+        # Parsed app config plus the file mtime it was read at; the Settings
+        # tab and web API write the same file, so a changed mtime forces a re-read.
+        self._app_cfg_cache: dict | None = None
+        self._app_cfg_mtime_ns: int | None = None
+        self._last_saved_json: str | None = None
+        self._first_pending_ts: float | None = None
+        # itemData (stripped) -> first row index, maintained by _add_indexed.
+        # Items are only ever appended, so indices stay valid.
+        self._pairs_data_index: dict[str, int] = {}
+        self._timerange_data_index: dict[str, int] = {}
+        self._raw_gen = 0
+        # Inputs of the in-flight backtest/download, read by the bound result handlers.
+        self._bt_strategy_code = ""
+        self._download_label = ""
+        self._pairs_dialog: QDialog | None = None
+        self._pairs_dialog_key: tuple = ()
+        self._pairs_items: dict[str, QListWidgetItem] = {}
+        self._pairs_filter_edit: QLineEdit | None = None
         self.setup_ui()
         self._load_defaults_from_bot_config()
         self._load_prefs_from_app_config()
@@ -44,7 +113,7 @@ class BacktestTab(QWidget):
         self.pairs_combo.setEditable(True)
         self.pairs_combo.setMinimumWidth(220)
         self.pairs_combo.setPlaceholderText("Pairs (optional) - comma or space separated")
-        self.pairs_combo.addItem("(no override)", "")
+        self._add_indexed(self.pairs_combo, "(no override)", "", self._pairs_data_index)
         self.btn_pairs_custom = QPushButton("Custom")
         self.btn_pairs_custom.clicked.connect(self.open_pairs_dialog)
 
@@ -52,7 +121,7 @@ class BacktestTab(QWidget):
         self.timerange_combo.setEditable(True)
         self.timerange_combo.setMinimumWidth(170)
         self.timerange_combo.setPlaceholderText("Timerange (optional), e.g. 20240101-20241231")
-        self.timerange_combo.addItem("(no timerange)", "")
+        self._add_indexed(self.timerange_combo, "(no timerange)", "", self._timerange_data_index)
         self._add_timerange_presets()
         self.btn_timerange_custom = QPushButton("Custom")
         self.btn_timerange_custom.clicked.connect(self.open_timerange_dialog)
@@ -91,20 +160,20 @@ class BacktestTab(QWidget):
         self.lbl_candle_completeness.setStyleSheet("font-weight: bold; color: #94a3b8; padding: 5px; border: 1px solid #334155; border-radius: 4px; background-color: #1e293b;")
         layout.addWidget(self.lbl_candle_completeness)
 
-        self.txt_strategy = QTextEdit()
+        self.txt_strategy = QPlainTextEdit()
         self.txt_strategy.setPlaceholderText("Paste strategy code here (must include a class inheriting from IStrategy)...")
         self.txt_strategy.setMinimumHeight(180)
         layout.addWidget(QLabel("Strategy Code"))
         layout.addWidget(self.txt_strategy)
 
-        self.txt_summary = QTextEdit()
+        self.txt_summary = QPlainTextEdit()
         self.txt_summary.setReadOnly(True)
         self.txt_summary.setPlaceholderText("Backtest summary will appear here...")
         self.txt_summary.setMinimumHeight(140)
         layout.addWidget(QLabel("Summary"))
         layout.addWidget(self.txt_summary)
 
-        self.txt_raw = QTextEdit()
+        self.txt_raw = QPlainTextEdit()
         self.txt_raw.setReadOnly(True)
         self.txt_raw.setPlaceholderText("Raw backtest JSON and output will appear here...")
         layout.addWidget(QLabel("Raw Result"))
@@ -112,29 +181,39 @@ class BacktestTab(QWidget):
 
         self.setLayout(layout)
 
+    def _add_indexed(self, combo: QComboBox, text: str, data, index: dict) -> None:
+        combo.addItem(text, data)
+        if isinstance(data, str):
+            index.setdefault(data.strip(), combo.count() - 1)
+
     def _add_timerange_presets(self):
         today = date.today()
+        today_str = today.strftime('%Y%m%d')
 
-        def _add(days: int):
-            start = today - timedelta(days=days)
-            tr = f"{start.strftime('%Y%m%d')}-{today.strftime('%Y%m%d')}"
-            self.timerange_combo.addItem(f"Last {days}d ({tr})", tr)
-
-        for d in [7, 30, 90, 180, 365]:
-            _add(d)
+        for days in (7, 30, 90, 180, 365):
+            tr = f"{(today - timedelta(days=days)).strftime('%Y%m%d')}-{today_str}"
+            self._add_indexed(self.timerange_combo, f"Last {days}d ({tr})", tr, self._timerange_data_index)
 
-        ytd_start = date(today.year, 1, 1)
-        ytd = f"{ytd_start.strftime('%Y%m%d')}-{today.strftime('%Y%m%d')}"
-        self.timerange_combo.addItem(f"YTD ({ytd})", ytd)
+        ytd = f"{today.year:04d}0101-{today_str}"
+        self._add_indexed(self.timerange_combo, f"YTD ({ytd})", ytd, self._timerange_data_index)
 
     def _extract_timerange(self, text: str):
-        m = re.search(r"(\d{8}-\d{8})", text or "")
+        m = _TIMERANGE_RE.search(text or "")
         return m.group(1) if m else None
 
     def _schedule_save_prefs(self, _text: str = ""):
         if self._running:
             return
-        self._prefs_save_timer.start(500)
+        # Debounce edits, but never hold a pending save longer than
+        # _PREFS_SAVE_MAX_WAIT_S while they keep arriving.
+        now = time.monotonic()
+        if self._first_pending_ts is None:
+            self._first_pending_ts = now
+        elif now - self._first_pending_ts > _PREFS_SAVE_MAX_WAIT_S:
+            self._prefs_save_timer.stop()
+            self._save_prefs_to_app_config()
+            return
+        self._prefs_save_timer.start(_PREFS_SAVE_DEBOUNCE_MS)
 
     def _get_current_pairs_value(self):
         pairs_data = self.pairs_combo.currentData()
@@ -157,9 +236,25 @@ class BacktestTab(QWidget):
         tr = self._extract_timerange(timerange_text) if timerange_text else None
         return tr or ""
 
-    def _save_prefs_to_app_config(self):
+    def _app_config_mtime_ns(self):
         try:
+            return os.stat(APP_CONFIG_PATH).st_mtime_ns
+        except OSError:
+            return None
+
+    def _get_app_config(self):
+        mtime_ns = self._app_config_mtime_ns()
+        if self._app_cfg_cache is None or mtime_ns != self._app_cfg_mtime_ns:
             cfg = load_app_config()
+            self._app_cfg_cache = cfg if isinstance(cfg, dict) else None
+            self._app_cfg_mtime_ns = mtime_ns
+            self._last_saved_json = None
+        return self._app_cfg_cache
+
+    def _save_prefs_to_app_config(self):
+        self._first_pending_ts = None
+        try:
+            cfg = self._get_app_config()
             if not isinstance(cfg, dict):
                 return
 
@@ -172,14 +267,24 @@ class BacktestTab(QWidget):
             bt['pairs'] = self._get_current_pairs_value()
             bt['timerange'] = self._get_current_timerange_value()
 
-            with open(APP_CONFIG_PATH, 'w', encoding='utf-8') as f:
-                json.dump(cfg, f, indent=2)
+            payload = json.dumps(cfg, indent=2)
+            if payload == self._last_saved_json:
+                return
+
+            # Write a sibling temp file and rename it over the config so a
+            # crash or a concurrent reader never sees a truncated file.
+            tmp_path = APP_CONFIG_PATH + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, APP_CONFIG_PATH)
+            self._last_saved_json = payload
+            self._app_cfg_mtime_ns = self._app_config_mtime_ns()
         except Exception:
             return
 
     def _load_prefs_from_app_config(self):
         try:
-            cfg = load_app_config()
+            cfg = self._get_app_config()
             if not isinstance(cfg, dict):
                 return
 
@@ -199,17 +304,12 @@ class BacktestTab(QWidget):
                     if idx >= 0:
                         self.pairs_combo.setCurrentIndex(idx)
                 else:
-                    idx = -1
-                    for i in range(self.pairs_combo.count()):
-                        d = self.pairs_combo.itemData(i)
-                        if isinstance(d, str) and d.strip() == pairs:
-                            idx = i
-                            break
+                    idx = self._pairs_data_index.get(pairs, -1)
                     if idx >= 0:
                         self.pairs_combo.setCurrentIndex(idx)
                     else:
                         if self.pairs_combo.findText(pairs) == -1:
-                            self.pairs_combo.addItem(pairs, pairs)
+                            self._add_indexed(self.pairs_combo, pairs, pairs, self._pairs_data_index)
                         self.pairs_combo.setCurrentText(pairs)
 
             tr = bt.get('timerange')
@@ -220,26 +320,20 @@ class BacktestTab(QWidget):
                     if idx >= 0:
                         self.timerange_combo.setCurrentIndex(idx)
                 else:
-                    idx = -1
-                    for i in range(self.timerange_combo.count()):
-                        d = self.timerange_combo.itemData(i)
-                        if isinstance(d, str) and d.strip() == tr:
-                            idx = i
-                            break
+                    idx = self._timerange_data_index.get(tr, -1)
                     if idx >= 0:
                         self.timerange_combo.setCurrentIndex(idx)
                     else:
                         if self.timerange_combo.findText(tr) == -1:
-                            self.timerange_combo.addItem(tr, tr)
+                            self._add_indexed(self.timerange_combo, tr, tr, self._timerange_data_index)
                         self.timerange_combo.setCurrentText(tr)
         except Exception:
             return
 
     def _load_defaults_from_bot_config(self):
         try:
-            with open(BOT_CONFIG_PATH, 'r', encoding='utf-8') as f:
-                cfg = json.load(f)
-            if not isinstance(cfg, dict):
+            cfg = load_bot_config()
+            if not cfg:
                 return
 
             timeframe = cfg.get('timeframe')
@@ -250,26 +344,35 @@ class BacktestTab(QWidget):
             if isinstance(ex, dict):
                 whitelist = ex.get('pair_whitelist')
                 if isinstance(whitelist, list) and whitelist:
-                    cleaned = [str(p).strip() for p in whitelist if str(p).strip()]
+                    stripped = (str(p).strip() for p in whitelist)
+                    cleaned = tuple(p for p in stripped if p)
                     self._known_pairs = cleaned
-                    joined = ",".join(cleaned)
-
-                    if joined:
-                        label = f"Whitelist ({len(cleaned)} pairs)"
-                        if self.pairs_combo.findText(label) == -1:
-                            self.pairs_combo.addItem(label, joined)
-
-                    for p in cleaned:
-                        if self.pairs_combo.findText(p) == -1:
-                            self.pairs_combo.addItem(p, p)
-
-                    if joined:
-                        self.pairs_combo.setCurrentIndex(self.pairs_combo.findText(label))
+                    if cleaned:
+                        self._populate_pairs_combo(cleaned, ",".join(cleaned))
 
             self._load_timerange_history()
         except Exception:
             return
 
+    def _populate_pairs_combo(self, pairs: tuple, joined: str):
+        """Add the whitelist entry plus one entry per pair and select the former.
+
+        Inserts run without change signals (they feed _schedule_save_prefs);
+        the final selection still emits.
+        """
+        combo = self.pairs_combo
+        label = f"Whitelist ({len(pairs)} pairs)"
+        combo.blockSignals(True)
+        try:
+            existing_texts = {combo.itemText(i) for i in range(combo.count())}
+            for text, data in zip((label, *pairs), (joined, *pairs)):
+                if text not in existing_texts:
+                    self._add_indexed(combo, text, data, self._pairs_data_index)
+                    existing_texts.add(text)
+        finally:
+            combo.blockSignals(False)
+        combo.setCurrentIndex(combo.findText(label))
+
     def open_timerange_dialog(self):
         dlg = QDialog(self)
         dlg.setWindowTitle("Select Timerange")
@@ -286,16 +389,20 @@ class BacktestTab(QWidget):
         default_end = today
 
         current = self._get_current_timerange_value()
-        if current:
-            m = re.match(r"^(\d{8})-(\d{8})$", current)
-            if m:
-                try:
-                    ys, ms, ds = int(m.group(1)[0:4]), int(m.group(1)[4:6]), int(m.group(1)[6:8])
-                    ye, me, de = int(m.group(2)[0:4]), int(m.group(2)[4:6]), int(m.group(2)[6:8])
-                    default_start = date(ys, ms, ds)
-                    default_end = date(ye, me, de)
-                except Exception:
-                    pass
+        # Fixed-width YYYYMMDD-YYYYMMDD; slice it instead of matching.
+        if (
+            current
+            and len(current) == 17
+            and current[8] == '-'
+            and current[:8].isdigit()
+            and current[9:].isdigit()
+        ):
+            try:
+                default_start = date(int(current[0:4]), int(current[4:6]), int(current[6:8]))
+                default_end = date(int(current[9:13]), int(current[13:15]), int(current[15:17]))
+            except Exception:
+                default_start = today - timedelta(days=30)
+                default_end = today
 
         start_edit.setDate(QDate(default_start.year, default_start.month, default_start.day))
         end_edit.setDate(QDate(default_end.year, default_end.month, default_end.day))
@@ -321,27 +428,21 @@ class BacktestTab(QWidget):
             return
 
         tr = f"{s.strftime('%Y%m%d')}-{e.strftime('%Y%m%d')}"
-        idx = -1
-        for i in range(self.timerange_combo.count()):
-            d = self.timerange_combo.itemData(i)
-            if isinstance(d, str) and d.strip() == tr:
-                idx = i
-                break
+        idx = self._timerange_data_index.get(tr, -1)
         if idx == -1:
-            self.timerange_combo.addItem(f"Custom ({tr})", tr)
+            self._add_indexed(self.timerange_combo, f"Custom ({tr})", tr, self._timerange_data_index)
             idx = self.timerange_combo.count() - 1
         self.timerange_combo.setCurrentIndex(idx)
         self._schedule_save_prefs()
 
-    def open_pairs_dialog(self):
-        pairs = list(dict.fromkeys([p for p in self._known_pairs if isinstance(p, str) and p.strip()]))
-
-        if not pairs:
-            QMessageBox.warning(self, "Warning", "No pairs available. Add exchange.pair_whitelist in user_data/config.json.")
-            return
-
-        current_raw = self._get_current_pairs_value()
-        current_set = set([p.strip() for p in current_raw.replace(",", " ").split() if p.strip()]) if current_raw else set()
+    def _ensure_pairs_dialog(self, pairs: list):
+        # The dialog and its list items are kept between opens and only
+        # rebuilt when the known pairs change.
+        key = tuple(pairs)
+        if self._pairs_dialog is not None and key == self._pairs_dialog_key:
+            return self._pairs_dialog
+        if self._pairs_dialog is not None:
+            self._pairs_dialog.deleteLater()
 
         dlg = QDialog(self)
         dlg.setWindowTitle("Select Pairs")
@@ -354,18 +455,25 @@ class BacktestTab(QWidget):
         listw = QListWidget()
         layout.addWidget(listw)
 
-        items = []
-        for p in pairs:
-            it = QListWidgetItem(p)
-            it.setFlags(it.flags() | Qt.ItemFlag.ItemIsUserCheckable)
-            it.setCheckState(Qt.CheckState.Checked if p in current_set else Qt.CheckState.Unchecked)
-            listw.addItem(it)
-            items.append(it)
+        items = {}
+        listw.setUpdatesEnabled(False)
+        try:
+            for p in pairs:
+                it = QListWidgetItem(p)
+                it.setFlags(it.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+                it.setCheckState(Qt.CheckState.Unchecked)
+                listw.addItem(it)
+                items[p] = it
+        finally:
+            listw.setUpdatesEnabled(True)
+
+        # Lower-cased names are computed once per dialog, not per keystroke.
+        pairs_lower = [(it, p.lower()) for p, it in items.items()]
 
         def _apply_filter(text: str):
             t = (text or "").strip().lower()
-            for it in items:
-                it.setHidden(bool(t) and t not in it.text().lower())
+            for it, low in pairs_lower:
+                it.setHidden(bool(t) and t not in low)
 
         filter_edit.textChanged.connect(_apply_filter)
 
@@ -377,7 +485,7 @@ class BacktestTab(QWidget):
         layout.addLayout(btn_row)
 
         def _set_all(state: bool):
-            for it in items:
+            for it in items.values():
                 it.setCheckState(Qt.CheckState.Checked if state else Qt.CheckState.Unchecked)
 
         btn_all.clicked.connect(lambda: _set_all(True))
@@ -388,13 +496,31 @@ class BacktestTab(QWidget):
         buttons.rejected.connect(dlg.reject)
         layout.addWidget(buttons)
 
+        self._pairs_dialog = dlg
+        self._pairs_dialog_key = key
+        self._pairs_items = items
+        self._pairs_filter_edit = filter_edit
+        return dlg
+
+    def open_pairs_dialog(self):
+        pairs = list(dict.fromkeys([p for p in self._known_pairs if isinstance(p, str) and p.strip()]))
+
+        if not pairs:
+            QMessageBox.warning(self, "Warning", "No pairs available. Add exchange.pair_whitelist in user_data/config.json.")
+            return
+
+        current_raw = self._get_current_pairs_value()
+        current_set = set([p.strip() for p in current_raw.replace(",", " ").split() if p.strip()]) if current_raw else set()
+
+        dlg = self._ensure_pairs_dialog(pairs)
+        self._pairs_filter_edit.clear()
+        for p, it in self._pairs_items.items():
+            it.setCheckState(Qt.CheckState.Checked if p in current_set else Qt.CheckState.Unchecked)
+
         if dlg.exec() != QDialog.DialogCode.Accepted:
             return
 
-        chosen = []
-        for it in items:
-            if it.checkState() == Qt.CheckState.Checked:
-                chosen.append(it.text())
+        chosen = [p for p, it in self._pairs_items.items() if it.checkState() == Qt.CheckState.Checked]
 
         if not chosen:
             idx = self.pairs_combo.findText('(no override)')
@@ -407,59 +533,31 @@ class BacktestTab(QWidget):
 
         joined = ",".join(chosen)
 
-        idx = -1
-        for i in range(self.pairs_combo.count()):
-            d = self.pairs_combo.itemData(i)
-            if isinstance(d, str) and d.strip() == joined:
-                idx = i
-                break
-
+        idx = self._pairs_data_index.get(joined, -1)
         if idx == -1:
             label = f"Custom ({len(chosen)} pairs)"
-            self.pairs_combo.addItem(label, joined)
+            self._add_indexed(self.pairs_combo, label, joined, self._pairs_data_index)
             idx = self.pairs_combo.count() - 1
 
         self.pairs_combo.setCurrentIndex(idx)
         self._schedule_save_prefs()
 
     def _load_timerange_history(self):
-        try:
-            root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            out_dir = os.path.join(root, "data", "backtest_results")
-            if not os.path.isdir(out_dir):
-                return
-
-            timeranges = set()
-            files = []
-            for name in os.listdir(out_dir):
-                if name.lower().endswith('.json'):
-                    files.append(os.path.join(out_dir, name))
-
-            files.sort(key=lambda p: os.path.getmtime(p), reverse=True)
-            for path in files[:30]:
-                try:
-                    with open(path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    if not isinstance(data, dict):
-                        continue
-
-                    meta = data.get('metadata')
-                    if isinstance(meta, dict):
-                        tr = meta.get('timerange')
-                        if isinstance(tr, str) and tr.strip():
-                            timeranges.add(tr.strip())
-
-                    tr2 = data.get('timerange')
-                    if isinstance(tr2, str) and tr2.strip():
-                        timeranges.add(tr2.strip())
-                except Exception:
-                    continue
+        # Result files are scanned on the pool so the tab paints first.
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out_dir = os.path.join(root, "data", "backtest_results")
+        worker = Worker(_scan_timerange_history, out_dir)
+        worker.signals.result.connect(self._apply_timerange_history)
+        self.threadpool.start(worker)
 
-            for tr in sorted(timeranges):
+    def _apply_timerange_history(self, timeranges):
+        self.timerange_combo.blockSignals(True)
+        try:
+            for tr in sorted(timeranges or ()):
                 if self.timerange_combo.findText(tr) == -1:
-                    self.timerange_combo.addItem(tr, tr)
-        except Exception:
-            return
+                    self._add_indexed(self.timerange_combo, tr, tr, self._timerange_data_index)
+        finally:
+            self.timerange_combo.blockSignals(False)
 
     def _set_running(self, running: bool):
         self._running = running
@@ -480,12 +578,30 @@ class BacktestTab(QWidget):
         file_path, _ = QFileDialog.getOpenFileName(self, "Select Strategy File", "", "Python Files (*.py)")
         if not file_path:
             return
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                self.txt_strategy.setText(f.read())
+        path = Path(file_path)
+
+        def _on_loaded(text: str):
+            self.txt_strategy.setPlainText(text)
             self.lbl_status.setText(f"Loaded: {file_path} | Config: {BOT_CONFIG_PATH}")
+
+        def _on_error(msg: str):
+            QMessageBox.critical(self, "Error", f"Failed to load file: {msg}")
+
+        try:
+            size = path.stat().st_size
+            if size <= _STRATEGY_SYNC_READ_MAX_BYTES:
+                _on_loaded(path.read_text(encoding='utf-8'))
+                return
         except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to load file: {e}")
+            _on_error(str(e))
+            return
+
+        # Large files are read on the pool so the event loop keeps running.
+        self.lbl_status.setText(f"Loading {file_path}...")
+        worker = Worker(path.read_text, encoding='utf-8')
+        worker.signals.result.connect(_on_loaded)
+        worker.signals.error.connect(_on_error)
+        self.threadpool.start(worker)
 
     def run_backtest_async(self):
         if self._running:
@@ -513,87 +629,99 @@ class BacktestTab(QWidget):
             pairs = pairs_text if pairs_text and not pairs_text.startswith('(') else None
 
         self._set_running(True)
-        self.txt_summary.setText("Running backtest... (this may take a while)")
-        self.txt_raw.setText("")
+        self.txt_summary.setPlainText("Running backtest... (this may take a while)")
+        self.txt_raw.setPlainText("")
+        self._raw_gen += 1
 
+        self._bt_strategy_code = strategy_code
         worker = Worker(run_backtest, strategy_code, BOT_CONFIG_PATH, timerange, timeframe, pairs)
+        queued = Qt.ConnectionType.QueuedConnection
+        worker.signals.result.connect(self._on_backtest_result, queued)
+        worker.signals.error.connect(self._on_backtest_error, queued)
+        worker.signals.finished.connect(self._on_worker_finished, queued)
+        self._job_pool.start(worker)
+
+    def _on_backtest_result(self, result: dict):
+        if not isinstance(result, dict):
+            QMessageBox.critical(self, "Error", "Unexpected backtest result format")
+            return
 
-        def _on_result(result: dict):
-            if not isinstance(result, dict):
-                QMessageBox.critical(self, "Error", "Unexpected backtest result format")
-                return
-
-            data = result.get("data")
-            stdout = result.get("stdout", "")
-            stderr = result.get("stderr", "")
-            result_file = result.get("result_file")
-            strategy_class = result.get("strategy_class")
-
-            summary_lines = []
-            summary_lines.append(f"Strategy: {strategy_class}")
-            summary_lines.append(f"Result file: {result_file}")
-
-            if isinstance(data, dict):
-                for key in ["strategy", "strategy_comparison", "results", "backtest", "metadata"]:
-                    if key in data:
-                        summary_lines.append(f"Contains: {key}")
-                
-                # Update Candle Completeness from metadata
-                meta = data.get('metadata', {})
-                if meta:
-                    timerange = meta.get('timerange', 'Unknown')
-                    self.lbl_candle_completeness.setText(f"Data Metadata: Timerange {timerange} | Status: Success")
-                    self.lbl_candle_completeness.setStyleSheet("font-weight: bold; color: #22c55e; padding: 5px; border: 1px solid #22c55e; border-radius: 4px; background-color: #064e3b;")
-
-            self.txt_summary.setText("\n".join(summary_lines))
-
-            raw_payload = {
-                "result_file": result_file,
-                "strategy_class": strategy_class,
-                "stdout": stdout,
-                "stderr": stderr,
-                "data": data,
-            }
-            self.txt_raw.setText(json.dumps(raw_payload, indent=2, ensure_ascii=False))
-
-            # Auto-load into AI Analysis tab
-            try:
-                main_window = self.window()
-                from PyQt6.QtWidgets import QTabWidget
-                tabs = main_window.findChild(QTabWidget)
-                if tabs:
-                    for i in range(tabs.count()):
-                        if tabs.tabText(i) == "AI Analysis":
-                            analysis_tab = tabs.widget(i)
-                            if hasattr(analysis_tab, "on_load_last_backtest"):
-                                analysis_tab.on_load_last_backtest()
-                            break
+        data = result.get("data")
+        stdout = result.get("stdout", "")
+        stderr = result.get("stderr", "")
+        result_file = result.get("result_file")
+        strategy_class = result.get("strategy_class")
+
+        summary_lines = []
+        summary_lines.append(f"Strategy: {strategy_class}")
+        summary_lines.append(f"Result file: {result_file}")
+
+        if isinstance(data, dict):
+            for key in ["strategy", "strategy_comparison", "results", "backtest", "metadata"]:
+                if key in data:
+                    summary_lines.append(f"Contains: {key}")
+            
+            # Update Candle Completeness from metadata
+            meta = data.get('metadata', {})
+            if meta:
+                timerange = meta.get('timerange', 'Unknown')
+                self.lbl_candle_completeness.setText(f"Data Metadata: Timerange {timerange} | Status: Success")
+                self.lbl_candle_completeness.setStyleSheet("font-weight: bold; color: #22c55e; padding: 5px; border: 1px solid #22c55e; border-radius: 4px; background-color: #064e3b;")
+
+        self.txt_summary.setPlainText("\n".join(summary_lines))
+
+        raw_payload = {
+            "result_file": result_file,
+            "strategy_class": strategy_class,
+            "stdout": stdout,
+            "stderr": stderr,
+            "data": data,
+        }
+        # Serializing a large result (and laying it out) is slow; format
+        # it on the pool and only show the first _RAW_DISPLAY_MAX_CHARS.
+        raw_gen = self._raw_gen
+        raw_worker = Worker(_format_raw_payload, raw_payload)
+
+        def _on_raw(text: str):
+            if raw_gen == self._raw_gen:
+                self.txt_raw.setPlainText(text)
+
+        raw_worker.signals.result.connect(_on_raw)
+        self.threadpool.start(raw_worker)
+
+        # Auto-load into AI Analysis tab
+        try:
+            main_window = self.window()
+            from PyQt6.QtWidgets import QTabWidget
+            tabs = main_window.findChild(QTabWidget)
+            if tabs:
+                for i in range(tabs.count()):
+                    if tabs.tabText(i) == "AI Analysis":
+                        analysis_tab = tabs.widget(i)
+                        if hasattr(analysis_tab, "on_load_last_backtest"):
+                            analysis_tab.on_load_last_backtest()
+                        break
+            
+            # Also store the strategy code and results for the AI Analysis tab
+            if not hasattr(main_window, 'last_backtest_strategy'):
+                setattr(main_window, 'last_backtest_strategy', self._bt_strategy_code)
+            else:
+                main_window.last_backtest_strategy = self._bt_strategy_code
                 
-                # Also store the strategy code and results for the AI Analysis tab
-                if not hasattr(main_window, 'last_backtest_strategy'):
-                    setattr(main_window, 'last_backtest_strategy', strategy_code)
-                else:
-                    main_window.last_backtest_strategy = strategy_code
-                    
-                if not hasattr(main_window, 'last_backtest_results'):
-                    setattr(main_window, 'last_backtest_results', raw_payload)
-                else:
-                    main_window.last_backtest_results = raw_payload
-            except Exception:
-                pass
-
-        def _on_error(msg: str):
-            self.txt_summary.setText(f"Backtest failed:\n{msg}")
-            self.lbl_candle_completeness.setText(f"Data Metadata: Error - {msg[:50]}...")
-            self.lbl_candle_completeness.setStyleSheet("font-weight: bold; color: #ef4444; padding: 5px; border: 1px solid #ef4444; border-radius: 4px; background-color: #450a0a;")
+            if not hasattr(main_window, 'last_backtest_results'):
+                setattr(main_window, 'last_backtest_results', raw_payload)
+            else:
+                main_window.last_backtest_results = raw_payload
+        except Exception:
+            pass
 
-        def _on_finished():
-            self._set_running(False)
+    def _on_backtest_error(self, msg: str):
+        self.txt_summary.setPlainText(f"Backtest failed:\n{msg}")
+        self.lbl_candle_completeness.setText(f"Data Metadata: Error - {msg[:50]}...")
+        self.lbl_candle_completeness.setStyleSheet("font-weight: bold; color: #ef4444; padding: 5px; border: 1px solid #ef4444; border-radius: 4px; background-color: #450a0a;")
 
-        worker.signals.result.connect(_on_result)
-        worker.signals.error.connect(_on_error)
-        worker.signals.finished.connect(_on_finished)
-        self.threadpool.start(worker)
+    def _on_worker_finished(self):
+        self._set_running(False)
 
     def download_data_async(self):
         if self._running:
@@ -616,24 +744,22 @@ class BacktestTab(QWidget):
             pairs = pairs_text if pairs_text and not pairs_text.startswith('(') else None
 
         self._set_running(True)
-        self.txt_summary.setText("Downloading historical data... (this may take a while)")
+        self.txt_summary.setPlainText("Downloading historical data... (this may take a while)")
 
+        self._download_label = f"{timerange or 'Full'} | {timeframe}"
         worker = Worker(download_data, BOT_CONFIG_PATH, timerange, timeframe, pairs)
-
-        def _on_result(_res):
-            self.txt_summary.setText("Data download complete.")
-            self.lbl_candle_completeness.setText(f"Data Metadata: Downloaded {timerange or 'Full'} | {timeframe}")
-            self.lbl_candle_completeness.setStyleSheet("font-weight: bold; color: #3b82f6; padding: 5px; border: 1px solid #3b82f6; border-radius: 4px; background-color: #172554;")
-
-        def _on_error(msg: str):
-            self.txt_summary.setText(f"Download failed:\n{msg}")
-            self.lbl_candle_completeness.setText("Data Metadata: Download Failed")
-            self.lbl_candle_completeness.setStyleSheet("font-weight: bold; color: #ef4444; padding: 5px; border: 1px solid #ef4444; border-radius: 4px; background-color: #450a0a;")
-
-        def _on_finished():
-            self._set_running(False)
-
-        worker.signals.result.connect(_on_result)
-        worker.signals.error.connect(_on_error)
-        worker.signals.finished.connect(_on_finished)
-        self.threadpool.start(worker)
+        queued = Qt.ConnectionType.QueuedConnection
+        worker.signals.result.connect(self._on_download_result, queued)
+        worker.signals.error.connect(self._on_download_error, queued)
+        worker.signals.finished.connect(self._on_worker_finished, queued)
+        self._job_pool.start(worker)
+
+    def _on_download_result(self, _res):
+        self.txt_summary.setPlainText("Data download complete.")
+        self.lbl_candle_completeness.setText(f"Data Metadata: Downloaded {self._download_label}")
+        self.lbl_candle_completeness.setStyleSheet("font-weight: bold; color: #3b82f6; padding: 5px; border: 1px solid #3b82f6; border-radius: 4px; background-color: #172554;")
+
+    def _on_download_error(self, msg: str):
+        self.txt_summary.setPlainText(f"Download failed:\n{msg}")
+        self.lbl_candle_completeness.setText("Data Metadata: Download Failed")
+        self.lbl_candle_completeness.setStyleSheet("font-weight: bold; color: #ef4444; padding: 5px; border: 1px solid #ef4444; border-radius: 4px; background-color: #450a0a;")
@@ -2,32 +2,221 @@
 Bot Control Tab for managing the Freqtrade bot
 """
 import logging
-import json
+import os
+import re
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
-    QLineEdit, QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView, QSpinBox,
+    QLineEdit, QMessageBox, QTableView, QHeaderView, QSpinBox,
     QFormLayout, QGroupBox
 )
-from PyQt6.QtCore import Qt, QThreadPool
+from PyQt6.QtCore import (
+    Qt, QThreadPool, QTimer, QAbstractTableModel, QModelIndex, QSignalBlocker
+)
+from PyQt6.QtGui import QBrush
 from api.client import FreqtradeClient
 from config.settings import BOT_CONFIG_PATH
 
-from utils.qt_worker import Worker
+from utils import json_codec
+from utils.qt_worker import Worker, WorkerSignals
 
 logger = logging.getLogger(__name__)
 
+_REFRESH_COALESCE_MS = 150
+_PAIR_SPLIT_RE = re.compile(r'\s*,\s*')
+
+_COLS = ('pair', 'trade_type', 'amount', 'open_rate', 'current_rate', 'profit_pct')
+_PROFIT_COL = 5
+# What the trades table reads from each API trade: the columns plus the diff key.
+_TRADE_FIELDS = ('trade_id',) + _COLS
+# data() runs per visible cell; resolve the enum members once.
+_DISPLAY_ROLE = Qt.ItemDataRole.DisplayRole
+_FOREGROUND_ROLE = Qt.ItemDataRole.ForegroundRole
+
+
+class _SingleFlight:
+    """Names of the operations currently in flight; a second start of one is refused.
+
+    Only touched from the GUI thread (slots and finished handlers), so it
+    needs no lock.
+    """
+
+    def __init__(self):
+        self._keys: set[str] = set()
+
+    def begin(self, key: str) -> bool:
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
+
+    def end(self, key: str) -> None:
+        self._keys.discard(key)
+
+
+def _project_trades(trades) -> list[dict]:
+    """Keep only _TRADE_FIELDS of each trade (runs on the worker thread)."""
+    if not isinstance(trades, list):
+        return []
+    return [
+        {k: t[k] for k in _TRADE_FIELDS if k in t} if isinstance(t, dict) else {}
+        for t in trades
+    ]
+
+
+def _profit_value(trade: dict) -> float:
+    try:
+        return float(trade.get('profit_pct', 0))
+    except Exception:
+        return 0.0
+
+
+class OpenTradesModel(QAbstractTableModel):
+    """Read-only table model over the open trades list from the bot API.
+
+    Rows are kept as the API dicts; cell text and colours are produced on
+    demand, so only the visible cells are ever formatted.
+    """
+
+    COLS = _COLS
+    HEADERS = ("Pair", "Type", "Amount", "Open Rate", "Current Rate", "Profit %")
+    PROFIT_COL = _PROFIT_COL
+
+    # Shared profit-colour brushes; data() hands these out instead of
+    # building a brush per cell.
+    _RED = QBrush(Qt.GlobalColor.red)
+    _GREEN = QBrush(Qt.GlobalColor.green)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: list[dict] = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLS)
+
+    @staticmethod
+    def _key(trade: dict):
+        return trade.get('trade_id', trade.get('pair'))
+
+    def _text(self, trade: dict, col: int) -> str:
+        if col == _PROFIT_COL:
+            return f"{_profit_value(trade):.4f}"
+        return str(trade.get(_COLS[col], ''))
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        col = index.column()
+        if role == _DISPLAY_ROLE:
+            return self._text(row, col)
+        if role == _FOREGROUND_ROLE and col == _PROFIT_COL:
+            return self._RED if _profit_value(row) < 0 else self._GREEN
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def set_rows(self, rows: list):
+        """Replace the trades, touching only the rows and cells that changed.
+
+        Trades are matched by trade_id (or pair): closed ones are removed,
+        new ones appended, and kept ones only report the cells whose text
+        differs. Falls back to a model reset when keys are not unique.
+        """
+        key = self._key
+        rows = [r if isinstance(r, dict) else {} for r in rows]
+        new_by_key = {key(r): r for r in rows}
+        old_keys = [key(r) for r in self._rows]
+        if len(new_by_key) != len(rows) or len(set(old_keys)) != len(old_keys):
+            self.beginResetModel()
+            self._rows = rows
+            self.endResetModel()
+            return
+
+        # Remove closed trades one contiguous run at a time, from the bottom
+        # up, so a batch of closes is one row-count change, not one per row.
+        i = len(self._rows) - 1
+        while i >= 0:
+            if old_keys[i] in new_by_key:
+                i -= 1
+                continue
+            last = i
+            while i > 0 and old_keys[i - 1] not in new_by_key:
+                i -= 1
+            self.beginRemoveRows(QModelIndex(), i, last)
+            del self._rows[i:last + 1]
+            self.endRemoveRows()
+            i -= 1
+
+        # Hot per-poll loop: bind the lookups once.
+        current = self._rows
+        text = self._text
+        cols = range(len(self.COLS))
+        pop_new = new_by_key.pop
+        emit = self.dataChanged.emit
+        index = self.index
+        for i, old in enumerate(current):
+            new = pop_new(key(old))
+            current[i] = new
+            changed = [c for c in cols if text(old, c) != text(new, c)]
+            if changed:
+                emit(index(i, changed[0]), index(i, changed[-1]))
+
+        added = [r for r in rows if key(r) in new_by_key]
+        if added:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            self._rows.extend(added)
+            self.endInsertRows()
+
+
 class BotControlTab(QWidget):
     def __init__(self, client: FreqtradeClient, threadpool: QThreadPool, parent=None):
         super().__init__(parent)
         self.client = client
         self.threadpool = threadpool
-        self._config_load_running = False
-        self._save_running = False
-        self._reload_running = False
-        self._open_trades_running = False
+        self._inflight = _SingleFlight()
+        # Refresh requests within _REFRESH_COALESCE_MS collapse into one fetch;
+        # errors stay silent only if every request in the burst asked for that.
+        self._refresh_silent = True
+        self._refresh_pending = False
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(_REFRESH_COALESCE_MS)
+        self._refresh_timer.timeout.connect(self._do_refresh_open_trades)
+        # Parsed BOT_CONFIG_PATH and the (mtime_ns, size) it was read at.
+        # Filled and used from worker threads; callers must not mutate it.
+        self._cfg_cache: dict | None = None
+        self._cfg_mtime: tuple = ()
+        # Config file I/O runs on its own small pool so it never queues behind
+        # the HTTP calls on the shared one. Load and save are each guarded by a
+        # running flag, so each reuses one signals object wired to bound slots.
+        self._io_pool = QThreadPool(self)
+        self._io_pool.setMaxThreadCount(1)
+        self._cfg_load_signals = WorkerSignals()
+        self._cfg_load_signals.result.connect(self._on_config_loaded)
+        self._cfg_load_signals.error.connect(self._on_config_load_error)
+        self._cfg_load_signals.finished.connect(self._on_config_load_finished)
+        self._cfg_save_signals = WorkerSignals()
+        self._cfg_save_signals.result.connect(self._on_config_saved)
+        self._cfg_save_signals.error.connect(self._on_config_save_error)
+        self._cfg_save_signals.finished.connect(self._on_config_save_finished)
+        self._shown_once = False
         self.setup_ui()
-        self.load_current_config_async()
-        self.refresh_open_trades_async(silent=True)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # Config read and trade fetch wait for the first show,
+        # so a tab the user never opens costs no file read or REST call.
+        if not self._shown_once:
+            self._shown_once = True
+            self.load_current_config_async()
+            self.refresh_open_trades_async(silent=True)
 
     def setup_ui(self):
         layout = QVBoxLayout()
@@ -69,9 +258,9 @@ class BotControlTab(QWidget):
 
         trades_box = QGroupBox("Open Trades")
         trades_layout = QVBoxLayout()
-        self.trades_table = QTableWidget()
-        self.trades_table.setColumnCount(6)
-        self.trades_table.setHorizontalHeaderLabels(["Pair", "Type", "Amount", "Open Rate", "Current Rate", "Profit %"])
+        self.trades_model = OpenTradesModel(self)
+        self.trades_table = QTableView()
+        self.trades_table.setModel(self.trades_model)
         self.trades_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.refresh_trades_button = QPushButton("Refresh open trades")
         self.refresh_trades_button.clicked.connect(self.refresh_open_trades_async)
@@ -82,25 +271,36 @@ class BotControlTab(QWidget):
         layout.addWidget(trades_box)
         self.setLayout(layout)
 
+    def _read_bot_config(self) -> dict:
+        """Parsed bot config, re-read only when the file changed on disk."""
+        st = os.stat(BOT_CONFIG_PATH)
+        stamp = (st.st_mtime_ns, st.st_size)
+        cfg = self._cfg_cache
+        if cfg is not None and stamp == self._cfg_mtime:
+            return cfg
+        with open(BOT_CONFIG_PATH, 'rb') as f:
+            cfg = json_codec.loads(f.read())
+        if isinstance(cfg, dict):
+            self._cfg_cache, self._cfg_mtime = cfg, stamp
+        return cfg
+
     def load_current_config_async(self):
-        if self._config_load_running:
+        if not self._inflight.begin('config_load'):
             return
 
-        self._config_load_running = True
         self.save_button.setEnabled(False)
+        self._io_pool.start(Worker(self._read_bot_config, signals=self._cfg_load_signals))
 
-        def _read_file():
-            with open(BOT_CONFIG_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-
-        worker = Worker(_read_file)
-
-        def _on_result(cfg):
-            try:
-                if not isinstance(cfg, dict):
-                    QMessageBox.critical(self, "Error", "Invalid bot config format (expected JSON object).")
-                    return
+    def _on_config_loaded(self, cfg):
+        try:
+            if not isinstance(cfg, dict):
+                QMessageBox.critical(self, "Error", "Invalid bot config format (expected JSON object).")
+                return
 
+            # Filling the form from disk is not a user edit; keep the field
+            # change signals quiet.
+            with QSignalBlocker(self.strategy_input), QSignalBlocker(self.timeframe_input), \
+                    QSignalBlocker(self.pairs_input), QSignalBlocker(self.max_open_trades_input):
                 self.strategy_input.setText(str(cfg.get('strategy', '')))
                 self.timeframe_input.setText(str(cfg.get('timeframe', '')))
 
@@ -118,80 +318,79 @@ class BotControlTab(QWidget):
                     self.max_open_trades_input.setValue(int(mot))
                 except Exception:
                     self.max_open_trades_input.setValue(0)
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to parse bot config: {e}")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to parse bot config: {e}")
 
-        def _on_error(msg: str):
-            QMessageBox.critical(self, "Error", f"Failed to load bot config: {msg}")
-
-        def _on_finished():
-            self._config_load_running = False
-            self.save_button.setEnabled(True)
+    def _on_config_load_error(self, msg: str):
+        QMessageBox.critical(self, "Error", f"Failed to load bot config: {msg}")
 
-        worker.signals.result.connect(_on_result)
-        worker.signals.error.connect(_on_error)
-        worker.signals.finished.connect(_on_finished)
-        self.threadpool.start(worker)
+    def _on_config_load_finished(self):
+        self._inflight.end('config_load')
+        self.save_button.setEnabled(True)
 
     def save_and_reload_async(self):
-        if self._save_running:
+        if not self._inflight.begin('save'):
             return
 
-        self._save_running = True
         self.save_button.setEnabled(False)
         self.reload_button.setEnabled(False)
 
         strategy = self.strategy_input.text().strip()
         timeframe = self.timeframe_input.text().strip()
-        pairs_raw = self.pairs_input.text()
-        pairs = [p.strip() for p in pairs_raw.split(',') if p.strip()]
+        pairs = [p for p in _PAIR_SPLIT_RE.split(self.pairs_input.text().strip()) if p]
         max_open_trades = int(self.max_open_trades_input.value())
 
-        def _write_file():
-            with open(BOT_CONFIG_PATH, 'r', encoding='utf-8') as f:
-                cfg = json.load(f)
-            if not isinstance(cfg, dict):
-                raise RuntimeError("Invalid bot config format")
-
-            cfg['strategy'] = strategy
-            cfg['timeframe'] = timeframe
-            cfg['max_open_trades'] = max_open_trades
-
-            ex = cfg.get('exchange')
-            if not isinstance(ex, dict):
-                ex = {}
-                cfg['exchange'] = ex
-            ex['pair_whitelist'] = pairs
-
-            with open(BOT_CONFIG_PATH, 'w', encoding='utf-8') as f:
-                json.dump(cfg, f, indent=4)
-
-            return True
-
-        worker = Worker(_write_file)
-
-        def _on_result(_ok: bool):
-            QMessageBox.information(self, "Success", "Bot config saved. Reloading bot...")
-            self.reload_bot_config_async()
-
-        def _on_error(msg: str):
-            QMessageBox.critical(self, "Error", f"Failed to save bot config: {msg}")
-
-        def _on_finished():
-            self._save_running = False
-            self.save_button.setEnabled(True)
-            self.reload_button.setEnabled(True)
-
-        worker.signals.result.connect(_on_result)
-        worker.signals.error.connect(_on_error)
-        worker.signals.finished.connect(_on_finished)
-        self.threadpool.start(worker)
+        self._io_pool.start(Worker(
+            self._write_bot_config, strategy, timeframe, pairs, max_open_trades,
+            signals=self._cfg_save_signals,
+        ))
+
+    def _write_bot_config(self, strategy: str, timeframe: str, pairs: list, max_open_trades: int) -> bool:
+        cfg = self._read_bot_config()
+        if not isinstance(cfg, dict):
+            raise RuntimeError("Invalid bot config format")
+        # Copy the levels edited below so a failed write leaves the cache intact.
+        cfg = dict(cfg)
+
+        cfg['strategy'] = strategy
+        cfg['timeframe'] = timeframe
+        cfg['max_open_trades'] = max_open_trades
+
+        ex = cfg.get('exchange')
+        ex = dict(ex) if isinstance(ex, dict) else {}
+        cfg['exchange'] = ex
+        ex['pair_whitelist'] = pairs
+
+        payload = json_codec.dumps(cfg, indent=True).encode('utf-8')
+        # One write to a sibling temp file, then rename it over the config,
+        # so the bot never reads a half-written file.
+        tmp_path = BOT_CONFIG_PATH + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, BOT_CONFIG_PATH)
+        st = os.stat(BOT_CONFIG_PATH)
+        self._cfg_cache, self._cfg_mtime = cfg, (st.st_mtime_ns, st.st_size)
+
+        return True
+
+    def _on_config_saved(self, _ok: bool):
+        QMessageBox.information(self, "Success", "Bot config saved. Reloading bot...")
+        self.reload_bot_config_async()
+
+    def _on_config_save_error(self, msg: str):
+        QMessageBox.critical(self, "Error", f"Failed to save bot config: {msg}")
+
+    def _on_config_save_finished(self):
+        self._inflight.end('save')
+        self.save_button.setEnabled(True)
+        self.reload_button.setEnabled(True)
 
     def reload_bot_config_async(self):
-        if self._reload_running:
+        if not self._inflight.begin('reload'):
             return
 
-        self._reload_running = True
         self.reload_button.setEnabled(False)
 
         worker = Worker(self.client.reload_config)
@@ -209,7 +408,7 @@ class BotControlTab(QWidget):
             QMessageBox.critical(self, "Error", f"Reload failed: {msg}")
 
         def _on_finished():
-            self._reload_running = False
+            self._inflight.end('reload')
             self.reload_button.setEnabled(True)
 
         worker.signals.result.connect(_on_result)
@@ -218,52 +417,40 @@ class BotControlTab(QWidget):
         self.threadpool.start(worker)
 
     def refresh_open_trades_async(self, silent: bool = False):
-        if self._open_trades_running:
+        self._refresh_silent = self._refresh_silent and bool(silent)
+        self._refresh_timer.start()
+
+    def _fetch_open_trades(self) -> list[dict]:
+        return _project_trades(self.client.get_open_trades())
+
+    def _do_refresh_open_trades(self):
+        if not self._inflight.begin('open_trades'):
+            # Fetch again once the in-flight request is done.
+            self._refresh_pending = True
             return
 
-        self._open_trades_running = True
+        silent = self._refresh_silent
+        self._refresh_silent = True
         self.refresh_trades_button.setEnabled(False)
 
-        worker = Worker(self.client.get_open_trades)
+        worker = Worker(self._fetch_open_trades)
 
         def _on_result(open_trades):
-            if not isinstance(open_trades, list):
-                open_trades = []
-            self.trades_table.setRowCount(len(open_trades))
-            for row, trade in enumerate(open_trades):
-                if not isinstance(trade, dict):
-                    trade = {}
-                self.trades_table.setItem(row, 0, QTableWidgetItem(str(trade.get('pair', ''))))
-                self.trades_table.setItem(row, 1, QTableWidgetItem(str(trade.get('trade_type', ''))))
-                self.trades_table.setItem(row, 2, QTableWidgetItem(str(trade.get('amount', ''))))
-                self.trades_table.setItem(row, 3, QTableWidgetItem(str(trade.get('open_rate', ''))))
-                self.trades_table.setItem(row, 4, QTableWidgetItem(str(trade.get('current_rate', ''))))
-
-                profit_val = trade.get('profit_pct', 0)
-                try:
-                    profit_val_f = float(profit_val)
-                except Exception:
-                    profit_val_f = 0.0
-                profit_item = QTableWidgetItem(f"{profit_val_f:.4f}")
-                if profit_val_f < 0:
-                    profit_item.setForeground(Qt.GlobalColor.red)
-                else:
-                    profit_item.setForeground(Qt.GlobalColor.green)
-                self.trades_table.setItem(row, 5, profit_item)
+            self.trades_model.set_rows(open_trades)
 
         def _on_error(msg: str):
             logger.warning("Failed to fetch open trades: %s", msg)
-            try:
-                self.trades_table.setRowCount(0)
-            except Exception:
-                pass
+            self.trades_model.set_rows([])
             if silent:
                 return
             QMessageBox.critical(self, "Error", f"Failed to fetch open trades: {msg}")
 
         def _on_finished():
-            self._open_trades_running = False
+            self._inflight.end('open_trades')
             self.refresh_trades_button.setEnabled(True)
+            if self._refresh_pending:
+                self._refresh_pending = False
+                self._refresh_timer.start()
 
         worker.signals.result.connect(_on_result)
         worker.signals.error.connect(_on_error)
@@ -1,6 +1,17 @@
+import atexit
+import hashlib
 import html
+import re
+import shutil
+import tempfile
+import time
+from collections import deque
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
 from typing import Callable, Optional
+from urllib.parse import quote
 
 from PyQt6.QtWidgets import (
     QWidget,
@@ -13,19 +24,173 @@ from PyQt6.QtWidgets import (
     QMessageBox,
     QSizePolicy,
 )
-from PyQt6.QtCore import Qt, QThreadPool, QCoreApplication
+from PyQt6.QtCore import Qt, QThreadPool, QCoreApplication, QTimer, QUrl
+from PyQt6.QtGui import QDesktopServices, QTextCursor
 
-from utils.ollama_client import OllamaClient
-from utils.ai_feedback import AIFeedbackCollector
+from utils.ollama_client import get_client
 from utils.qt_worker import Worker
 
 
+# Bubble and code-block styling, set once as the chat document's default
+# style sheet so each message only carries class names.
+_BUBBLE_COLORS = {
+    # kind: (background, alignment, border)
+    "user": ("#1e2a4a", "right", "#4a8cff"),
+    "assistant": ("#1a2e22", "left", "#4caf50"),
+    "system": ("#222222", "center", "#555555"),
+}
+_CHAT_CSS = "".join(
+    [
+        f".row-{kind} {{ margin: 10px 0; text-align: {align}; }}"
+        f".bubble-{kind} {{ display: inline-block; max-width: 95%; background: {bg}; "
+        f"border: 1px solid {border}; border-radius: 14px; padding: 12px 14px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}"
+        for kind, (bg, align, border) in _BUBBLE_COLORS.items()
+    ]
+    + [
+        ".title { font-size: 12px; color: #cccccc; margin-bottom: 8px; font-weight: bold; }",
+        ".body { font-size: 14px; line-height: 1.4; white-space: normal; }",
+        ".sep { margin: 6px 0; padding: 6px 0; border-top: 1px solid rgba(255,255,255,0.1); }",
+        ".code-block { margin-top: 10px; margin-bottom: 10px; }",
+        ".code-label { font-size: 12px; color: #aad4ff; margin-bottom: 6px; font-weight: bold; }",
+        "pre.code { margin:0; background:#0e1420; border:1px solid #2a4a7a; "
+        "border-radius:12px; padding:12px; overflow:auto; box-shadow: 0 2px 4px rgba(0,0,0,0.1); "
+        "font-family: Consolas, Menlo, monospace; font-size:13px; color:#f0f0f0; }",
+        ".suggestions { margin: 10px 0; padding: 10px; background: #111111; }",
+        ".suggestions-title { font-size: 12px; color: #aaaaaa; margin-bottom: 8px; }",
+        "a.suggest { color: #e0e0e0; background: #222222; font-size: 13px; text-decoration: none; }",
+    ]
+)
+
+# role -> (style kind, title label); other roles render as system messages.
+_BUBBLE_KINDS = {
+    "user": ("user", "You"),
+    "assistant": ("assistant", "AI"),
+}
+_SYSTEM_KIND = ("system", "System")
+
+
+def _now_hhmm() -> str:
+    return datetime.now().strftime("%H:%M")
+
+
+_BUBBLE_TMPL = (
+    "<div class='row-{kind}'><div class='bubble-{kind}'>"
+    "<div class='title'>{who} · {ts}</div>"
+    "<div class='body'>{body}</div>"
+    "</div></div>"
+)
+
+
+def _bubble_html(role: str, body_html: str, ts: str) -> str:
+    """Wrap rendered message HTML in the bubble for ``role``, titled with ``ts``."""
+    kind, who = _BUBBLE_KINDS.get(role, _SYSTEM_KIND)
+    # The labels and the HH:MM stamp contain nothing to escape.
+    return _BUBBLE_TMPL.format_map({"kind": kind, "who": who, "ts": ts, "body": body_html})
+
+
+# A ``` fence up to the next ``` or, when unclosed, to the end of the text.
+_FENCE_RE = re.compile(r"```(.*?)(```|\Z)", re.DOTALL)
+
+
+@lru_cache(maxsize=256)
+def _render_text_with_code_blocks(text: str) -> str:
+    """HTML for a chat message, with ``` fences rendered as code blocks.
+
+    Cached on the message text, so a message that recurs (status lines,
+    repeated answers) is only rendered once.
+    """
+    t = text or ""
+    parts = []
+    pos = 0
+    for m in _FENCE_RE.finditer(t):
+        parts.append(_render_plain(t[pos:m.start()]))
+        pos = m.end()
+        block = m.group(1)
+        if not m.group(2):
+            parts.append(_render_code(block, lang=""))
+            break
+
+        lang = ""
+        first_nl = block.find("\n")
+        if first_nl != -1:
+            maybe_lang = block[:first_nl].strip()
+            if len(maybe_lang) <= 20 and " " not in maybe_lang and "\t" not in maybe_lang:
+                lang = maybe_lang
+                block = block[first_nl + 1 :]
+
+        parts.append(_render_code(block, lang=lang))
+    else:
+        parts.append(_render_plain(t[pos:]))
+
+    return "".join(parts)
+
+
+def _render_plain(text: str) -> str:
+    safe = html.escape(text)
+    safe = safe.replace("\n", "<br>")
+    return safe
+
+
+# Code blocks longer than this are written to a file and shown as a link,
+# so the chat document does not hold (and lay out) their full text.
+_INLINE_CODE_MAX_CHARS = 8192
+_CODE_SUFFIXES = {"python": ".py", "py": ".py", "json": ".json"}
+_spill_dir: Optional[Path] = None
+
+
+def _spill_code(code: str, lang: str) -> Path:
+    """Write a code block to this session's chat temp dir (named by content hash)."""
+    global _spill_dir
+    if _spill_dir is None:
+        _spill_dir = Path(tempfile.mkdtemp(prefix="4tie-chat-"))
+        atexit.register(shutil.rmtree, _spill_dir, True)
+    digest = hashlib.blake2b(code.encode("utf-8"), digest_size=12).hexdigest()
+    path = _spill_dir / f"{digest}{_CODE_SUFFIXES.get(lang.lower(), '.txt')}"
+    if not path.exists():
+        path.write_text(code, encoding="utf-8")
+    return path
+
+
+def _render_code(code: str, lang: str = "") -> str:
+    label = html.escape(lang) if lang else "code"
+    code = code.rstrip("\n")
+    if len(code) > _INLINE_CODE_MAX_CHARS:
+        try:
+            path = _spill_code(code, lang)
+        except OSError:
+            pass
+        else:
+            size_kb = len(code.encode("utf-8")) / 1024
+            return (
+                "<div class='code-block'>"
+                f"<div class='code-label'>{label}</div>"
+                f"<a href='{path.as_uri()}'>[{label} block, {size_kb:.1f} KB \u2014 click to view]</a>"
+                "</div>"
+            )
+    safe_code = html.escape(code)
+    return (
+        "<div class='code-block'>"
+        f"<div class='code-label'>{label}</div>"
+        f"<pre class='code'><code>{safe_code}</code></pre>"
+        "</div>"
+    )
+
+
+# Suggestion categories for _get_ai_suggestions: strategy, risk, code. The
+# lookahead makes the scan report keywords that overlap an earlier one too.
+_SUGGESTION_KEYWORDS_RE = re.compile(
+    r"(?=(?:(strategy|backtest|indicator|optimize)"
+    r"|(risk|drawdown|stop loss|position size)"
+    r"|(code|python|json|error)))",
+    re.IGNORECASE,
+)
+
+
 class ChatDock(QDockWidget):
     # Configuration constants for memory management
     MAX_HISTORY_MESSAGES = 100  # Maximum number of messages to keep in history
-    MAX_DISPLAYED_MESSAGES = 50  # Maximum messages to display at once
-    HTML_SIZE_THRESHOLD = 1000000  # 1MB - trigger cleanup when HTML exceeds this
-    MESSAGE_GROUPING_THRESHOLD = 10  # Group messages after this many consecutive messages
+    MAX_DISPLAYED_BLOCKS = 2000  # Text blocks kept in the view; Qt drops the oldest beyond this
+    OLLAMA_CHECK_TTL_S = 30.0  # Seconds an Ollama availability check stays valid
 
     def __init__(
         self,
@@ -48,14 +213,24 @@ class ChatDock(QDockWidget):
         self.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Expanding)
 
         self.threadpool = threadpool
-        self.ollama = OllamaClient(base_url=base_url, model=model, options=options if isinstance(options, dict) else {})
+        self.ollama = get_client(base_url, model, options if isinstance(options, dict) else {})
         self._context_provider = context_provider
-        self._feedback_collector = AIFeedbackCollector()
 
         self._running = False
-        self._history: list[dict] = []
-        self._message_count = 0  # Track total messages for cleanup
-        self._consecutive_messages = 0  # Track consecutive messages for grouping
+        # Last Ollama availability result; refreshed off the UI thread at most
+        # every OLLAMA_CHECK_TTL_S seconds when the user sends a message.
+        self._ollama_ok = True
+        self._ollama_checked_at = 0.0
+        self._ollama_check_running = False
+        # The ready message is kept apart; everything after it lives in a
+        # bounded deque that drops the oldest entry on append.
+        self._system_prefix: list[dict] = []
+        self._history: deque[dict] = deque(maxlen=self.MAX_HISTORY_MESSAGES)
+        # Scroll-to-bottom requests within one frame collapse into one scroll
+        self._scroll_timer = QTimer(self)
+        self._scroll_timer.setSingleShot(True)
+        self._scroll_timer.setInterval(16)
+        self._scroll_timer.timeout.connect(self._flush_scroll)
 
         root = QWidget()
         root.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
@@ -67,7 +242,10 @@ class ChatDock(QDockWidget):
 
         self.chat_view = QTextBrowser()
         self.chat_view.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        self.chat_view.setOpenExternalLinks(True)
+        # Every link goes through _on_anchor: suggestion links fill the input,
+        # anything else (web pages, spilled code files) opens outside the view.
+        self.chat_view.setOpenLinks(False)
+        self.chat_view.anchorClicked.connect(self._on_anchor)
         self.chat_view.setReadOnly(True)
         self.chat_view.setAccessibleName("Chat messages display")
         self.chat_view.setAccessibleDescription("Displays the conversation history with AI assistant")
@@ -82,6 +260,13 @@ class ChatDock(QDockWidget):
             "font-size: 14px;"
             "}"
         )
+        # Appends go through this cursor at the end of the document, so a new
+        # bubble costs its own size instead of a toHtml()/setHtml() round-trip
+        # of the whole history.
+        self.chat_view.document().setDefaultStyleSheet(_CHAT_CSS)
+        self.chat_view.document().setMaximumBlockCount(self.MAX_DISPLAYED_BLOCKS)
+        self._cursor = QTextCursor(self.chat_view.document())
+        self._cursor.movePosition(QTextCursor.MoveOperation.End)
 
         self.input_line = QLineEdit()
         self.input_line.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
@@ -180,7 +365,9 @@ class ChatDock(QDockWidget):
         chat_model = model
         if isinstance(task_models, dict):
             chat_model = str(task_models.get("chat") or chat_model)
-        self.ollama.update_settings(base_url=base_url, model=chat_model, options=options)
+        self.ollama = get_client(base_url, chat_model, options)
+        self._ollama_ok = True
+        self._ollama_checked_at = 0.0
 
     def _set_running(self, running: bool) -> None:
         self._running = running
@@ -207,256 +394,52 @@ class ChatDock(QDockWidget):
 
     def _create_bubble(self, role: str, text: str) -> str:
         """Create HTML bubble for a message (extracted for reuse)"""
-        ts = datetime.now().strftime("%H:%M")
-        safe = self._render_text_with_code_blocks(text)
-
-        if role == "user":
-            bg = "#1e2a4a"
-            align = "right"
-            border = "#4a8cff"
-            title = f"You · {ts}"
-        elif role == "assistant":
-            bg = "#1a2e22"
-            align = "left"
-            border = "#4caf50"
-            title = f"AI · {ts}"
-        else:
-            bg = "#222222"
-            align = "center"
-            border = "#555555"
-            title = f"System · {ts}"
-
-        return (
-            f"<div style='margin: 10px 0; text-align: {align};'>"
-            f"<div style='display: inline-block; max-width: 95%; background: {bg}; "
-            f"border: 1px solid {border}; border-radius: 14px; padding: 12px 14px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>"
-            f"<div style='font-size: 12px; color: #cccccc; margin-bottom: 8px; font-weight: bold;'>{html.escape(title)}</div>"
-            f"<div style='font-size: 14px; line-height: 1.4; white-space: normal;'>{safe}</div>"
-            f"</div>"
-            f"</div>"
-        )
+        return _bubble_html(role, _render_text_with_code_blocks(text), _now_hhmm())
 
     def _append_system(self, text: str) -> None:
-        self._history.append({"role": "system", "content": text})
+        msg = {"role": "system", "content": text}
+        if not self._system_prefix and not self._history:
+            self._system_prefix.append(msg)
+        else:
+            self._history.append(msg)
         self._append_bubble("system", text)
-        self._check_memory_pressure()
 
     def _append_user(self, text: str) -> None:
         self._history.append({"role": "user", "content": text})
         self._append_bubble("user", text)
-        self._check_memory_pressure()
 
     def _append_assistant(self, text: str) -> None:
         self._history.append({"role": "assistant", "content": text})
         self._append_bubble("assistant", text)
-        self._check_memory_pressure()
-
-    def _check_memory_pressure(self) -> None:
-        """Check memory pressure and cleanup if needed"""
-        self._message_count += 1
-        self._consecutive_messages += 1
-        
-        # Cleanup every N messages or when history exceeds limit
-        if self._message_count % 10 == 0 or len(self._history) > self.MAX_HISTORY_MESSAGES:
-            self._trim_history()
-        
-        # Group messages if consecutive messages exceed threshold
-        if self._consecutive_messages >= self.MESSAGE_GROUPING_THRESHOLD:
-            self._group_messages()
-    
-    def _trim_history(self) -> None:
-        """Trim history to maximum allowed messages to prevent memory leaks"""
-        if len(self._history) <= self.MAX_HISTORY_MESSAGES:
-            return
-        
-        # Keep system message at the start, trim oldest non-system messages
-        system_messages = [h for h in self._history if h.get("role") == "system"]
-        other_messages = [h for h in self._history if h.get("role") != "system"]
-        
-        # Keep only the most recent non-system messages
-        trimmed_others = other_messages[-self.MAX_HISTORY_MESSAGES:]
-        self._history = system_messages + trimmed_others
-        
-        # Also trim the displayed HTML to match
-        self._trim_display()
-    
-    def _group_messages(self) -> None:
-        """Group consecutive messages to optimize display"""
-        if len(self._history) < self.MESSAGE_GROUPING_THRESHOLD:
-            return
-        
-        # Reset consecutive message counter
-        self._consecutive_messages = 0
-        
-        # Group messages in the display
-        visible_history = self._history[-self.MAX_DISPLAYED_MESSAGES:]
-        
-        # Build HTML with grouped messages
-        html_parts = ["<html><head><meta charset='utf-8'></head><body style='margin:0;'>"]
-        
-        # Add grouped message indicator
-        if len(self._history) > self.MAX_DISPLAYED_MESSAGES:
-            html_parts.append("<div style='padding: 10px; color: #888; font-size: 12px; text-align: center;'>")
-            html_parts.append("--- Previous messages grouped ---")
-            html_parts.append("</div>")
-        
-        # Group messages by sender
-        current_sender = None
-        grouped_messages = []
-        
-        for msg in visible_history:
-            role = msg.get("role", "")
-            content = msg.get("content", "")
-            
-            if role != current_sender:
-                if grouped_messages:
-                    # Add grouped messages
-                    grouped_html = self._create_grouped_bubble(current_sender, grouped_messages)
-                    html_parts.append(grouped_html)
-                    grouped_messages = []
-                current_sender = role
-            
-            grouped_messages.append(content)
-        
-        # Add any remaining grouped messages
-        if grouped_messages:
-            grouped_html = self._create_grouped_bubble(current_sender, grouped_messages)
-            html_parts.append(grouped_html)
-        
-        html_parts.append("</body></html>")
-        
-        self.chat_view.setHtml("".join(html_parts))
-        self.chat_view.verticalScrollBar().setValue(self.chat_view.verticalScrollBar().maximum())
-    
-    def _create_grouped_bubble(self, role: str, messages: list[str]) -> str:
-        """Create HTML bubble for grouped messages"""
-        ts = datetime.now().strftime("%H:%M")
-        
-        if role == "user":
-            bg = "#1e2a4a"
-            align = "right"
-            border = "#4a8cff"
-            title = f"You · {ts}"
-        elif role == "assistant":
-            bg = "#1a2e22"
-            align = "left"
-            border = "#4caf50"
-            title = f"AI · {ts}"
-        else:
-            bg = "#222222"
-            align = "center"
-            border = "#555555"
-            title = f"System · {ts}"
-        
-        # Combine messages with separators
-        combined_content = "<div style='margin: 6px 0; padding: 6px 0; border-top: 1px solid rgba(255,255,255,0.1);'>".join(
-            [self._render_text_with_code_blocks(msg) for msg in messages]
-        )
-        
-        return (
-            f"<div style='margin: 10px 0; text-align: {align};'>"
-            f"<div style='display: inline-block; max-width: 95%; background: {bg}; "
-            f"border: 1px solid {border}; border-radius: 14px; padding: 12px 14px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>"
-            f"<div style='font-size: 12px; color: #cccccc; margin-bottom: 8px; font-weight: bold;'>{html.escape(title)}</div>"
-            f"<div style='font-size: 14px; line-height: 1.4; white-space: normal;'>{combined_content}</div>"
-            f"</div>"
-            f"</div>"
-        )
-    
-    def _trim_display(self) -> None:
-        """Trim the displayed messages to prevent HTML bloat"""
-        # Rebuild HTML with only recent messages
-        visible_history = self._history[-self.MAX_DISPLAYED_MESSAGES:]
-         
-        # Build compact HTML without full history
-        html_parts = ["<html><head><meta charset='utf-8'></head><body style='margin:0;'>"]
-        html_parts.append("<div style='padding: 10px; color: #888; font-size: 12px; text-align: center;'>")
-        html_parts.append("--- Previous messages hidden ---")
-        html_parts.append("</div>")
-         
-        for msg in visible_history:
-            role = msg.get("role", "")
-            content = msg.get("content", "")
-            bubble = self._create_bubble(role, content)
-            html_parts.append(bubble)
-         
-        html_parts.append("</body></html>")
-         
-        self.chat_view.setHtml("".join(html_parts))
-        self.chat_view.verticalScrollBar().setValue(self.chat_view.verticalScrollBar().maximum())
 
     def _append_bubble(self, role: str, text: str) -> None:
         """Append a single bubble to the chat view (original behavior)"""
         bubble = self._create_bubble(role, text)
         
-        # Reset consecutive messages counter for new messages
-        self._consecutive_messages = 0
-        
-        cur = self.chat_view.toHtml()
-        if not cur:
-            cur = "<html><head><meta charset='utf-8'></head><body style='margin:0;'></body></html>"
-         
-        # Check HTML size and rebuild if too large
-        if len(cur) > self.HTML_SIZE_THRESHOLD:
-            self._trim_display()
-        else:
-            self.chat_view.setHtml(cur.replace("</body>", bubble + "</body>"))
-            self.chat_view.verticalScrollBar().setValue(self.chat_view.verticalScrollBar().maximum())
-
-    def _render_text_with_code_blocks(self, text: str) -> str:
-        t = text or ""
-        parts = []
-        while True:
-            start = t.find("```")
-            if start == -1:
-                parts.append(self._render_plain(t))
-                break
-            parts.append(self._render_plain(t[:start]))
-            t = t[start + 3 :]
-            end = t.find("```")
-            if end == -1:
-                parts.append(self._render_code(t, lang=""))
-                break
-            block = t[:end]
-            t = t[end + 3 :]
-
-            lang = ""
-            first_nl = block.find("\n")
-            if first_nl != -1:
-                maybe_lang = block[:first_nl].strip()
-                if len(maybe_lang) <= 20 and " " not in maybe_lang and "\t" not in maybe_lang:
-                    lang = maybe_lang
-                    block = block[first_nl + 1 :]
-
-            parts.append(self._render_code(block, lang=lang))
-
-        return "".join(parts)
-
-    def _render_plain(self, text: str) -> str:
-        safe = html.escape(text)
-        safe = safe.replace("\n", "<br>")
-        return safe
-
-    def _render_code(self, code: str, lang: str = "") -> str:
-        safe_code = html.escape(code.rstrip("\n"))
-        label = html.escape(lang) if lang else "code"
-        return (
-            "<div style='margin-top: 10px; margin-bottom: 10px;'>"
-            f"<div style='font-size: 12px; color: #aad4ff; margin-bottom: 6px; font-weight: bold;'>{label}</div>"
-            "<pre style='margin:0; background:#0e1420; border:1px solid #2a4a7a; "
-            "border-radius:12px; padding:12px; overflow:auto; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>"
-            f"<code style='font-family: Consolas, Menlo, monospace; font-size:13px; color:#f0f0f0;'>{safe_code}</code>"
-            "</pre>"
-            "</div>"
-        )
+        # The document's block limit evicts the oldest content as this inserts
+        self._insert_html(bubble)
 
-    def _build_prompt(self, user_text: str) -> str:
-        system = (
-            "You are an expert quantitative trading assistant specialized in Freqtrade strategies. "
-            "Be precise and actionable. When proposing fixes, prefer code-level changes. "
-            "If you include code or JSON, wrap it in fenced code blocks using triple backticks with a language."
-        )
+    def _insert_html(self, fragment: str) -> None:
+        """Insert an HTML fragment at the end of the chat view and scroll to it."""
+        self._cursor.movePosition(QTextCursor.MoveOperation.End)
+        self._cursor.insertHtml(fragment)
+        self._request_scroll()
 
+    def _request_scroll(self) -> None:
+        """Scroll the chat view to the bottom on the next timer tick."""
+        if not self._scroll_timer.isActive():
+            self._scroll_timer.start()
+
+    def _flush_scroll(self) -> None:
+        bar = self.chat_view.verticalScrollBar()
+        bar.setValue(bar.maximum())
+
+    def _prompt_snapshot(self) -> tuple[str, list[tuple[str, str]]]:
+        """App context and the last 20 user/assistant turns, taken on the UI thread.
+
+        The context provider reads widgets and the history is mutated by the
+        UI, so both are captured here; _build_prompt then runs on the worker.
+        """
         ctx = ""
         if callable(self._context_provider):
             try:
@@ -464,15 +447,29 @@ class ChatDock(QDockWidget):
             except Exception:
                 ctx = ""
 
-        history = [h for h in self._history if h.get("role") in ("user", "assistant")]
-        history = history[-20:]
+        # Collected from the newest end
+        history = []
+        for h in reversed(self._history):
+            role = h.get("role")
+            if role in ("user", "assistant"):
+                history.append((role, str(h.get("content", ""))))
+                if len(history) == 20:
+                    break
+        history.reverse()
+        return ctx, history
+
+    @staticmethod
+    def _build_prompt(user_text: str, ctx: str, history: list[tuple[str, str]]) -> str:
+        system = (
+            "You are an expert quantitative trading assistant specialized in Freqtrade strategies. "
+            "Be precise and actionable. When proposing fixes, prefer code-level changes. "
+            "If you include code or JSON, wrap it in fenced code blocks using triple backticks with a language."
+        )
 
         lines = [f"SYSTEM: {system}"]
         if ctx.strip():
             lines.append(f"CONTEXT (real app state):\n{ctx.strip()}")
-        for h in history:
-            role = h.get("role")
-            content = str(h.get("content", ""))
+        for role, content in history:
             if role == "user":
                 lines.append(f"USER: {content}")
             else:
@@ -482,6 +479,10 @@ class ChatDock(QDockWidget):
         lines.append("ASSISTANT:")
         return "\n\n".join(lines)
 
+    def _run_generation(self, user_text: str, ctx: str, history: list[tuple[str, str]]) -> str:
+        """Worker body: assemble the prompt and ask the model."""
+        return self.ollama.generate_text(self._build_prompt(user_text, ctx, history))
+
     def send(self) -> None:
         if self._running:
             return
@@ -490,17 +491,22 @@ class ChatDock(QDockWidget):
         if not text:
             return
 
-        if not self.ollama.is_available():
-            QMessageBox.critical(self, "Error", "Ollama is not available. Start it with: ollama serve")
+        # The availability probe is a network call; never run it on the UI
+        # thread. A recent negative result blocks the send, a stale one is
+        # re-checked in the background while the message goes out.
+        fresh = time.monotonic() - self._ollama_checked_at <= self.OLLAMA_CHECK_TTL_S
+        if fresh and not self._ollama_ok:
+            self._show_ollama_unavailable()
             return
+        if not fresh:
+            self._check_ollama_async()
 
         self.input_line.setText("")
         self._append_user(text)
         self._set_running(True)
 
-        prompt = self._build_prompt(text)
-
-        worker = Worker(self.ollama.generate_text, prompt)
+        ctx, history = self._prompt_snapshot()
+        worker = Worker(self._run_generation, text, ctx, history)
 
         def _on_result(answer: str):
             if not isinstance(answer, str):
@@ -522,6 +528,29 @@ class ChatDock(QDockWidget):
         worker.signals.finished.connect(_on_finished)
         self.threadpool.start(worker)
     
+    def _show_ollama_unavailable(self) -> None:
+        QMessageBox.critical(self, "Error", "Ollama is not available. Start it with: ollama serve")
+
+    def _check_ollama_async(self) -> None:
+        if self._ollama_check_running:
+            return
+        self._ollama_check_running = True
+        worker = Worker(self.ollama.is_available)
+        worker.signals.result.connect(self._on_ollama_checked)
+        worker.signals.finished.connect(self._on_ollama_check_finished)
+        self.threadpool.start(worker)
+
+    def _on_ollama_checked(self, ok) -> None:
+        self._ollama_ok = bool(ok)
+        self._ollama_checked_at = time.monotonic()
+        # While the send that triggered this re-check is in flight, its own
+        # error bubble reports the outage; a dialog on top would repeat it.
+        if not self._ollama_ok and not self._running:
+            self._show_ollama_unavailable()
+
+    def _on_ollama_check_finished(self) -> None:
+        self._ollama_check_running = False
+
     def _submit_feedback(self, rating: int):
         """Submit feedback on the last AI response"""
         if len(self._history) < 2:  # Need at least user question and AI response
@@ -547,7 +576,9 @@ class ChatDock(QDockWidget):
         
         # Submit feedback
         try:
-            self._feedback_collector.submit_feedback(
+            from utils.ai_feedback import get_feedback_collector
+
+            get_feedback_collector().submit_feedback(
                 prompt=last_user,
                 response=last_assistant,
                 rating=rating,
@@ -566,12 +597,17 @@ class ChatDock(QDockWidget):
 
     def closeEvent(self, event) -> None:
         # If the application is shutting down, allow the dock to close.
-        try:
-            if QCoreApplication.instance() is not None and QCoreApplication.closingDown():
-                event.accept()
-                return
-        except Exception:
-            pass
+        app = QCoreApplication.instance()
+        if app is not None and app.closingDown():
+            event.accept()
+            return
+
+        # Otherwise, don't allow closing via the titlebar X.
+        # Users can hide/show via View -> AI Chat.
+        event.ignore()
+        restore = getattr(self.parent(), "restore_chat_dock", None)
+        if restore is not None:
+            restore()
     
     def _get_ai_suggestions(self) -> list[str]:
         """Generate AI-driven suggestions based on conversation context"""
@@ -579,14 +615,21 @@ class ChatDock(QDockWidget):
             return []
         
         # Get recent conversation context
-        recent_messages = self._history[-5:]  # Last 5 messages
+        recent_messages = islice(self._history, max(0, len(self._history) - 5), None)  # Last 5 messages
         context = "\n".join([f"{msg.get('role', 'unknown')}: {msg.get('content', '')}" for msg in recent_messages])
         
-        # Simple suggestion logic based on keywords
+        # Simple suggestion logic based on keywords: one scan marks which
+        # categories occur (bit 1 strategy, 2 risk, 4 code)
+        hits = 0
+        for m in _SUGGESTION_KEYWORDS_RE.finditer(context):
+            hits |= 1 if m.group(1) else 2 if m.group(2) else 4
+            if hits == 7:
+                break
+
         suggestions = []
         
         # Check for strategy-related questions
-        if any(keyword in context.lower() for keyword in ['strategy', 'backtest', 'indicator', 'optimize']):
+        if hits & 1:
             suggestions.extend([
                 "How can I improve my strategy's performance?",
                 "What are the best indicators for this market condition?",
@@ -595,7 +638,7 @@ class ChatDock(QDockWidget):
             ])
         
         # Check for risk-related questions
-        if any(keyword in context.lower() for keyword in ['risk', 'drawdown', 'stop loss', 'position size']):
+        if hits & 2:
             suggestions.extend([
                 "What's the optimal risk management approach?",
                 "How can I reduce my drawdown?",
@@ -604,7 +647,7 @@ class ChatDock(QDockWidget):
             ])
         
         # Check for code-related questions
-        if any(keyword in context.lower() for keyword in ['code', 'python', 'json', 'error']):
+        if hits & 4:
             suggestions.extend([
                 "Review this code for potential issues",
                 "Suggest improvements for this implementation",
@@ -616,42 +659,29 @@ class ChatDock(QDockWidget):
         unique_suggestions = list(dict.fromkeys(suggestions))
         return unique_suggestions[:3]
     
+    def _on_anchor(self, url: QUrl) -> None:
+        """Fill the input line from a suggestion link; open any other link externally"""
+        if url.scheme() == "suggest":
+            self.input_line.setText(url.path())
+            self.input_line.setFocus()
+            return
+        QDesktopServices.openUrl(url)
+    
     def _show_suggestions(self) -> None:
         """Display AI-driven suggestions in the chat"""
         suggestions = self._get_ai_suggestions()
         if not suggestions:
             return
         
-        # Format suggestions as clickable buttons
-        suggestion_html = "<div style='margin: 10px 0; padding: 10px; background: #111111; border-radius: 8px;'>"
-        suggestion_html += "<div style='font-size: 12px; color: #aaaaaa; margin-bottom: 8px;'>💡 AI Suggestions:</div>"
-        
-        for suggestion in suggestions:
-            # Create a clickable suggestion that fills the input field
-            safe_suggestion = html.escape(suggestion)
-            suggestion_html += (
-                f"<div style='margin: 4px 0; padding: 6px 10px; background: #222222; border-radius: 6px; "
-                f"color: #e0e0e0; font-size: 13px; cursor: pointer; display: inline-block; "
-                f"margin-right: 8px;' "
-                f"onclick='document.getElementById(\"input_line\").value = \"{safe_suggestion}\"; "
-                f"document.getElementById(\"input_line\").focus();'>"
-                f"{safe_suggestion}</div>"
-            )
-        
-        suggestion_html += "</div>"
+        # Each suggestion is a suggest: link that _on_anchor puts in the input line
+        links = "&nbsp; ".join(
+            f"<a class='suggest' href='suggest:{quote(suggestion, safe='')}'>&nbsp;{html.escape(suggestion)}&nbsp;</a>"
+            for suggestion in suggestions
+        )
+        suggestion_html = (
+            "<div class='suggestions'><div class='suggestions-title'>💡 AI Suggestions:</div>"
+            f"{links}</div>"
+        )
         
         # Add suggestions to chat view
-        cur = self.chat_view.toHtml()
-        if cur:
-            self.chat_view.setHtml(cur.replace("</body>", suggestion_html + "</body>"))
-            self.chat_view.verticalScrollBar().setValue(self.chat_view.verticalScrollBar().maximum())
-
-        # Otherwise, don't allow closing via the titlebar X.
-        # Users can hide/show via View -> AI Chat.
-        event.ignore()
-        try:
-            parent = self.parent()
-            if parent is not None and hasattr(parent, "restore_chat_dock"):
-                parent.restore_chat_dock()
-        except Exception:
-            pass
+        self._insert_html(suggestion_html)
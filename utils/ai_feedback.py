@@ -3,6 +3,7 @@ AI Feedback Collection System
 """
 import json
 import os
+import threading
 import time
 from typing import Dict, List, Optional
 
@@ -166,4 +167,17 @@ class AIFeedbackCollector:
             
             return deleted_count
         except Exception:
-            return 0
\ No newline at end of file
+            return 0
+
+
+_COLLECTOR: Optional[AIFeedbackCollector] = None
+_COLLECTOR_LOCK = threading.Lock()
+
+
+def get_feedback_collector() -> AIFeedbackCollector:
+    """Return the process-wide feedback collector, creating it on first use"""
+    global _COLLECTOR
+    with _COLLECTOR_LOCK:
+        if _COLLECTOR is None:
+            _COLLECTOR = AIFeedbackCollector()
+        return _COLLECTOR
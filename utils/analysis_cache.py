@@ -0,0 +1,77 @@
+import hashlib
+import io
+import re
+import threading
+import tokenize
+from collections import OrderedDict
+from typing import List, Optional
+
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(text: str) -> str:
+    """Canonical form of a prompt/strategy blob used for cache keys.
+
+    Python source is re-tokenized so comments, blank lines and the exact
+    indentation width do not matter while block structure still does. Text
+    that does not tokenize as Python just has its whitespace collapsed.
+    """
+    if not isinstance(text, str):
+        return ""
+
+    try:
+        parts: List[str] = []
+        for tok in tokenize.generate_tokens(io.StringIO(text).readline):
+            if tok.type in (tokenize.COMMENT, tokenize.NL, tokenize.ENCODING, tokenize.ENDMARKER):
+                continue
+            if tok.type == tokenize.INDENT:
+                parts.append("<INDENT>")
+            elif tok.type == tokenize.DEDENT:
+                parts.append("<DEDENT>")
+            elif tok.type == tokenize.NEWLINE:
+                parts.append("\n")
+            else:
+                parts.append(tok.string)
+        return " ".join(parts)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return _WS_RE.sub(" ", text).strip()
+
+
+class AnalysisCache:
+    """LRU cache for AI responses, keyed by a blake2b digest of the normalized prompt."""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.blake2b(normalize_prompt(text).encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, text: str) -> Optional[str]:
+        k = self.key(text)
+        with self._lock:
+            hit = self._entries.get(k)
+            if hit is not None:
+                self._entries.move_to_end(k)
+            return hit
+
+    def put(self, text: str, response: str) -> None:
+        if not isinstance(response, str) or not response.strip():
+            return
+        k = self.key(text)
+        with self._lock:
+            self._entries[k] = response
+            self._entries.move_to_end(k)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
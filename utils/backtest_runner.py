@@ -1,15 +1,26 @@
+import bisect
 import json
 import logging
 import math
 import os
 import re
+import shutil
 import subprocess
 import sys
 import time
+import uuid
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Dict, Optional, List, Tuple
 from pathlib import Path
 
+from utils import json_codec
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - ijson is optional
+    ijson = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -166,12 +177,19 @@ def _extract_trade_profit_pct(trade: Dict[str, Any]) -> Optional[float]:
     return None
 
 
+def _summary_metadata(backtest_json: Dict[str, Any]) -> Dict[str, Any]:
+    meta = backtest_json.get("metadata") if isinstance(backtest_json.get("metadata"), dict) else {}
+    return {
+        "timerange": meta.get("timerange"),
+        "timeframe": meta.get("timeframe"),
+        "exchange": meta.get("exchange"),
+    }
+
+
 def summarize_backtest_data(backtest_json: Dict[str, Any], max_trades: int = 30) -> Dict[str, Any]:
     if not isinstance(backtest_json, dict):
         raise ValueError("backtest_json must be a dict")
 
-    meta = backtest_json.get("metadata") if isinstance(backtest_json.get("metadata"), dict) else {}
-
     # Find trades list in a schema-agnostic way.
     trades_any = _deep_find_first(
         backtest_json,
@@ -249,11 +267,7 @@ def summarize_backtest_data(backtest_json: Dict[str, Any], max_trades: int = 30)
         return out
 
     summary = {
-        "metadata": {
-            "timerange": meta.get("timerange"),
-            "timeframe": meta.get("timeframe"),
-            "exchange": meta.get("exchange"),
-        },
+        "metadata": _summary_metadata(backtest_json),
         "metrics": metrics,
         "trades_detected": len(trades),
         "worst_trades": [_compact_trade(t) for t in worst],
@@ -278,6 +292,61 @@ def _safe_str(v: Any) -> Optional[str]:
     return None
 
 
+_TRADE_DATE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})")
+
+# Upper edges of the trade-level percentage profit bins.
+_PROFIT_BIN_EDGES = (-5.0, -2.0, -1.0, -0.5, -0.1, 0.1, 0.5, 1.0, 2.0, 5.0, float("inf"))
+_PROFIT_BIN_LABELS = (
+    "<= -5%",
+    "-5% .. -2%",
+    "-2% .. -1%",
+    "-1% .. -0.5%",
+    "-0.5% .. -0.1%",
+    "-0.1% .. +0.1%",
+    "+0.1% .. +0.5%",
+    "+0.5% .. +1%",
+    "+1% .. +2%",
+    "+2% .. +5%",
+    ">= +5%",
+)
+
+
+def _forensics_loop(profits: List[float]) -> Tuple[float, float, int, int]:
+    """Single pass over per-trade profit pct.
+
+    Returns (compounded total return fraction, max drawdown fraction,
+    longest win streak, longest loss streak).
+    """
+    equity = 1.0
+    peak = 1.0
+    max_dd = 0.0
+    win_run = loss_run = 0
+    max_win_run = max_loss_run = 0
+
+    for p in profits:
+        equity *= 1.0 + p / 100.0
+        if equity > peak:
+            peak = equity
+        dd = (equity - peak) / peak
+        if dd < max_dd:
+            max_dd = dd
+
+        if p > 0:
+            win_run += 1
+            loss_run = 0
+            if win_run > max_win_run:
+                max_win_run = win_run
+        elif p < 0:
+            loss_run += 1
+            win_run = 0
+            if loss_run > max_loss_run:
+                max_loss_run = loss_run
+        else:
+            win_run = loss_run = 0
+
+    return equity - 1.0, abs(max_dd), max_win_run, max_loss_run
+
+
 def build_trade_forensics(backtest_json: Dict[str, Any], max_groups: int = 8) -> Dict[str, Any]:
     """Build a deterministic quant forensics report from a backtest result.
 
@@ -287,7 +356,9 @@ def build_trade_forensics(backtest_json: Dict[str, Any], max_groups: int = 8) ->
     if not isinstance(backtest_json, dict):
         raise ValueError("backtest_json must be a dict")
 
-    summary = summarize_backtest_data(backtest_json, max_trades=0)
+    # Only the metadata block of the summary is reported here; skip the
+    # metric lookups, which each walk the whole result tree.
+    metadata = _summary_metadata(backtest_json)
     trades_any = _deep_find_first(
         backtest_json,
         lambda x: isinstance(x, list)
@@ -312,7 +383,7 @@ def build_trade_forensics(backtest_json: Dict[str, Any], max_groups: int = 8) ->
             v = t.get(k)
             if not isinstance(v, str) or not v.strip():
                 continue
-            m = re.match(r"^(\d{4}-\d{2}-\d{2})", v.strip())
+            m = _TRADE_DATE_RE.match(v.strip())
             if not m:
                 continue
             try:
@@ -405,7 +476,7 @@ def build_trade_forensics(backtest_json: Dict[str, Any], max_groups: int = 8) ->
     n = len(profits)
     if n == 0:
         return {
-            "metadata": summary.get("metadata"),
+            "metadata": metadata,
             "trades_detected": len(trades),
             "trade_frequency": {
                 "range_start": day_min.isoformat() if day_min is not None else None,
@@ -429,22 +500,9 @@ def build_trade_forensics(backtest_json: Dict[str, Any], max_groups: int = 8) ->
             return 0.0
         return math.sqrt(v)
 
-    def _compute_equity_curve_metrics() -> Dict[str, Any]:
-        equity = 1.0
-        peak = 1.0
-        max_dd = 0.0
+    total_return, max_dd_abs, max_win_streak, max_loss_streak = _forensics_loop(profits)
 
-        for p in profits:
-            r = p / 100.0
-            equity *= (1.0 + r)
-            if equity > peak:
-                peak = equity
-            dd = (equity - peak) / peak
-            if dd < max_dd:
-                max_dd = dd
-
-        total_return = equity - 1.0
-        max_dd_abs = abs(max_dd)
+    def _compute_equity_curve_metrics() -> Dict[str, Any]:
         calmar = (total_return / max_dd_abs) if max_dd_abs > 0 else None
 
         return {
@@ -479,40 +537,14 @@ def build_trade_forensics(backtest_json: Dict[str, Any], max_groups: int = 8) ->
             "volatility_trade": vol,
         }
 
-    def _max_streak(sign: int) -> int:
-        best = 0
-        cur = 0
-        for p in profits:
-            if (p > 0 and sign > 0) or (p < 0 and sign < 0):
-                cur += 1
-                if cur > best:
-                    best = cur
-            else:
-                cur = 0
-        return best
-
     def _distribution_bins() -> Dict[str, Any]:
         # Percentage profit bins (trade-level). Stable and interpretable for AI.
-        bins = [
-            (-float("inf"), -5.0, "<= -5%"),
-            (-5.0, -2.0, "-5% .. -2%"),
-            (-2.0, -1.0, "-2% .. -1%"),
-            (-1.0, -0.5, "-1% .. -0.5%"),
-            (-0.5, -0.1, "-0.5% .. -0.1%"),
-            (-0.1, 0.1, "-0.1% .. +0.1%"),
-            (0.1, 0.5, "+0.1% .. +0.5%"),
-            (0.5, 1.0, "+0.5% .. +1%"),
-            (1.0, 2.0, "+1% .. +2%"),
-            (2.0, 5.0, "+2% .. +5%"),
-            (5.0, float("inf"), ">= +5%"),
-        ]
-
-        counts: Dict[str, int] = {label: 0 for _a, _b, label in bins}
+        counts: Dict[str, int] = {label: 0 for label in _PROFIT_BIN_LABELS}
         for p in profits:
-            for a, b, label in bins:
-                if a < p <= b:
-                    counts[label] += 1
-                    break
+            # Bin i covers (edge[i-1], edge[i]]; NaN belongs to no bin.
+            if p != p or p == -float("inf"):
+                continue
+            counts[_PROFIT_BIN_LABELS[bisect.bisect_left(_PROFIT_BIN_EDGES, p)]] += 1
 
         return {
             "n": len(profits),
@@ -604,7 +636,7 @@ def build_trade_forensics(backtest_json: Dict[str, Any], max_groups: int = 8) ->
         return rows[:max_groups]
 
     report = {
-        "metadata": summary.get("metadata"),
+        "metadata": metadata,
         "trades_detected": len(trades),
         "trades_scored": n,
         "trade_frequency": {
@@ -631,8 +663,8 @@ def build_trade_forensics(backtest_json: Dict[str, Any], max_groups: int = 8) ->
             "fee_dominated_fraction": fee_dominated_fraction,
         },
         "tiny_edge_fraction": tiny_edge_count / n,
-        "max_win_streak": _max_streak(+1),
-        "max_loss_streak": _max_streak(-1),
+        "max_win_streak": max_win_streak,
+        "max_loss_streak": max_loss_streak,
         "profit_pct_distribution": _distribution_bins(),
         "risk_adjusted": {
             **_compute_equity_curve_metrics(),
@@ -675,6 +707,13 @@ def _cleanup_temp_files(tmp_strat_dir: str, max_age_hours: int = 24) -> int:
                     deleted_count += 1
             except Exception as e:
                 logger.warning(f"Failed to clean up temp file {file_path}: {e}")
+        for dir_path in tmp_path.glob("run_*"):
+            try:
+                if dir_path.is_dir() and (current_time - dir_path.stat().st_mtime) > (max_age_hours * 3600):
+                    shutil.rmtree(dir_path, ignore_errors=True)
+                    deleted_count += 1
+            except Exception as e:
+                logger.warning(f"Failed to clean up temp dir {dir_path}: {e}")
     except Exception as e:
         logger.warning(f"Failed to clean up temp directory {tmp_strat_dir}: {e}")
     
@@ -708,6 +747,25 @@ def _cleanup_backtest_results(out_dir: str, max_files: int = 20) -> int:
     return deleted_count
 
 
+@lru_cache(maxsize=1)
+def _detect_python_cmd() -> str:
+    """Python command that can run ``-m freqtrade``; probed once per process.
+
+    In Replit, 'python3' is often more reliable than sys.executable for
+    invoking module-based CLIs that might be installed in site-packages.
+    Probing spawns a full freqtrade import, so it is not repeated for every
+    backtest/download (or for both runs of a baseline+candidate compare).
+    """
+    for p in ["python3", "python"]:
+        try:
+            # Check if freqtrade is available as a module for this command
+            subprocess.run([p, "-m", "freqtrade", "--version"], capture_output=True, check=True)
+            return p
+        except Exception:
+            continue
+    return sys.executable
+
+
 def download_data(
     config_path: str,
     timerange: Optional[str] = None,
@@ -716,17 +774,7 @@ def download_data(
 ) -> Dict[str, Any]:
     root = _project_root()
 
-    # Detect which python command to use. In Replit, 'python3' is often more reliable than sys.executable
-    # for invoking module-based CLIs that might be installed in site-packages.
-    python_cmd = sys.executable
-    for p in ["python3", "python"]:
-        try:
-            # Check if freqtrade is available as a module for this command
-            subprocess.run([p, "-m", "freqtrade", "--version"], capture_output=True, check=True)
-            python_cmd = p
-            break
-        except:
-            continue
+    python_cmd = _detect_python_cmd()
 
     cmd = [
         python_cmd,
@@ -778,6 +826,32 @@ def download_data(
     }
 
 
+_CANCEL_POLL_SECONDS = 0.5
+
+
+def _run_cancellable(cmd: List[str], *, cwd: str, timeout: float, cancel_event: Optional[Any]) -> Tuple[str, str, int]:
+    """subprocess.run(capture_output=True, text=True) that also polls ``cancel_event``."""
+    proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    deadline = time.time() + timeout
+    while True:
+        try:
+            stdout, stderr = proc.communicate(timeout=_CANCEL_POLL_SECONDS)
+            return stdout, stderr, proc.returncode
+        except subprocess.TimeoutExpired:
+            if cancel_event is not None and cancel_event.is_set():
+                proc.terminate()
+                try:
+                    proc.communicate(timeout=5)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.communicate()
+                raise RuntimeError("Backtest cancelled")
+            if time.time() > deadline:
+                proc.kill()
+                proc.communicate()
+                raise subprocess.TimeoutExpired(cmd, timeout)
+
+
 def run_backtest(
     strategy_code: str,
     config_path: str,
@@ -787,7 +861,14 @@ def run_backtest(
     fee: Optional[float] = None,
     dry_run_wallet: Optional[float] = None,
     max_open_trades: Optional[int] = None,
+    cancel_event: Optional[Any] = None,
 ) -> Dict[str, Any]:
+    """Run a freqtrade backtest for ``strategy_code``.
+
+    ``cancel_event`` is anything with an ``is_set()`` method (e.g. a
+    threading.Event); when it becomes set the freqtrade subprocess is
+    terminated and RuntimeError("Backtest cancelled") is raised.
+    """
     if not strategy_code or not strategy_code.strip():
         raise ValueError("Strategy code is empty")
 
@@ -804,9 +885,14 @@ def run_backtest(
     _cleanup_temp_files(tmp_strat_dir)
     _cleanup_backtest_results(out_dir)
 
+    # Each run gets its own strategy directory and result name so concurrent
+    # runs of the same strategy class cannot pick up each other's files.
     ts = time.strftime("%Y%m%d_%H%M%S")
-    strategy_file = os.path.join(tmp_strat_dir, f"analysis_strategy_{ts}.py")
-    out_filename = f"backtest_{class_name}_{ts}.json"
+    run_tag = f"{ts}_{uuid.uuid4().hex[:8]}"
+    run_strat_dir = os.path.join(tmp_strat_dir, f"run_{run_tag}")
+    os.makedirs(run_strat_dir, exist_ok=True)
+    strategy_file = os.path.join(run_strat_dir, f"analysis_strategy_{ts}.py")
+    out_filename = f"backtest_{class_name}_{run_tag}.json"
     out_file = os.path.join(out_dir, out_filename)
 
     strategy_file_temp = None
@@ -816,14 +902,7 @@ def run_backtest(
         strategy_file_temp = strategy_file
 
         # Use detected python command
-        python_cmd = sys.executable
-        for p in ["python3", "python"]:
-            try:
-                subprocess.run([p, "-m", "freqtrade", "--version"], capture_output=True, check=True)
-                python_cmd = p
-                break
-            except:
-                continue
+        python_cmd = _detect_python_cmd()
 
         cmd = [
             python_cmd,
@@ -835,7 +914,7 @@ def run_backtest(
             "-s",
             class_name,
             "--strategy-path",
-            tmp_strat_dir,
+            run_strat_dir,
             "--export",
             "trades",
             "--backtest-directory",
@@ -888,20 +967,14 @@ def run_backtest(
         logger.info("Running backtest: %s", " ".join(cmd))
 
         started_ts = time.time()
-        proc = subprocess.run(
-            cmd,
-            cwd=root,
-            capture_output=True,
-            text=True,
-            timeout=60 * 20,
-        )
+        stdout, stderr, returncode = _run_cancellable(cmd, cwd=root, timeout=60 * 20, cancel_event=cancel_event)
 
-        stdout = proc.stdout or ""
-        stderr = proc.stderr or ""
+        stdout = stdout or ""
+        stderr = stderr or ""
 
-        if proc.returncode != 0:
+        if returncode != 0:
             raise RuntimeError(
-                f"Backtest failed (exit={proc.returncode}).\nSTDOUT:\n{stdout[-4000:]}\n\nSTDERR:\n{stderr[-4000:]}"
+                f"Backtest failed (exit={returncode}).\nSTDOUT:\n{stdout[-4000:]}\n\nSTDERR:\n{stderr[-4000:]}"
             )
 
         result_kind = "json"
@@ -941,3 +1014,54 @@ def run_backtest(
                 os.remove(strategy_file_temp)
             except Exception as e:
                 logger.warning(f"Failed to remove temp strategy file {strategy_file_temp}: {e}")
+        shutil.rmtree(run_strat_dir, ignore_errors=True)
+
+
+def run_backtest_summary(strategy_code: str, config_path: str, cancel_event: Optional[Any] = None) -> Dict[str, Any]:
+    """Run a backtest and return only its summary.
+
+    The full backtest JSON is dropped as soon as it is summarized, so two
+    runs side by side hold only their compact summaries. ``cancel_event`` is
+    passed through to run_backtest.
+    """
+    bt_result = run_backtest(strategy_code=strategy_code, config_path=config_path, cancel_event=cancel_event)
+    if not isinstance(bt_result, dict) or not isinstance(bt_result.get("data"), dict):
+        raise RuntimeError("Backtest output missing JSON data")
+    return summarize_backtest_data(bt_result["data"])
+
+
+_TIMERANGE_PREFIXES = ("timerange", "metadata.timerange")
+
+
+def _result_timeranges_streamed(path: str) -> set:
+    found = set()
+    with open(path, "rb") as f:
+        for prefix, event, value in ijson.parse(f):
+            if event == "string" and prefix in _TIMERANGE_PREFIXES and value.strip():
+                found.add(value.strip())
+    return found
+
+
+def _result_timeranges_parsed(path: str) -> set:
+    found = set()
+    with open(path, "rb") as f:
+        data = json_codec.loads(f.read())
+    if not isinstance(data, dict):
+        return found
+    meta = data.get("metadata")
+    for tr in (data.get("timerange"), meta.get("timerange") if isinstance(meta, dict) else None):
+        if isinstance(tr, str) and tr.strip():
+            found.add(tr.strip())
+    return found
+
+
+def read_result_timeranges(path: str) -> set:
+    """Top-level and metadata timerange strings of a backtest result file.
+
+    Result files can be many MB of trades; with ijson installed the file is
+    streamed and only those two keys are read. Otherwise it is parsed whole
+    and the same two keys are read, so both paths agree on every file.
+    """
+    if ijson is not None:
+        return _result_timeranges_streamed(path)
+    return _result_timeranges_parsed(path)
@@ -0,0 +1,40 @@
+"""
+JSON encode/decode helpers that use orjson when it is installed
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def loads(data: str | bytes | bytearray) -> Any:
+    """Decode JSON text or bytes. Raises ValueError on invalid input."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8")
+    return json.loads(data)
+
+
+def dumps(obj: Any, *, indent: bool = False) -> str:
+    """Encode to a str without ASCII escaping, optionally with 2-space indentation.
+
+    This is not a drop-in json.dumps. With orjson, NaN and Infinity become
+    null, datetime and numpy values are serialized, and non-str dict keys
+    are coerced to strings. Anything orjson refuses (e.g. ints too large
+    for 64 bits) and every call without orjson go through the stdlib
+    encoder with default=str: NaN stays NaN and other unknown objects are
+    written as their str().
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, option=option).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False, default=str)
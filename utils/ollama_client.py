@@ -12,11 +12,35 @@ import threading
 from queue import Queue
 
 from utils.knowledge_base import KnowledgeBase
+from utils import json_codec
 
 logger = logging.getLogger(__name__)
 
+_STRATEGY_CLASS_RE = re.compile(
+    r"^\s*class\s+([A-Za-z_][A-Za-z0-9_]*)\s*\(.*IStrategy.*\)\s*:\s*$", re.MULTILINE
+)
+
 # Session will be created per instance to allow custom configuration
 
+_CLIENTS: Dict[str, "OllamaClient"] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_client(base_url: str, model: str, options: Optional[Dict] = None) -> "OllamaClient":
+    """Return the process-wide client for ``base_url``, creating it on first use.
+
+    Sharing one client keeps a single HTTP connection pool per endpoint even
+    when a widget is rebuilt or the model is switched; a reused client is
+    moved to ``model`` (and ``options``, when given).
+    """
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(base_url)
+        if client is None:
+            client = _CLIENTS[base_url] = OllamaClient(base_url=base_url, model=model, options=options)
+        else:
+            client.update_settings(base_url=base_url, model=model, options=options)
+    return client
+
 
 class OllamaClient:
     """Client for interacting with Ollama models with retry logic"""
@@ -139,6 +163,8 @@ class OllamaClient:
         if isinstance(self.options, dict) and self.options:
             payload["options"] = self.options
         
+        start_time = time.time()
+        self._active_requests += 1
         try:
             response = self._make_request(
                 'POST',
@@ -148,29 +174,39 @@ class OllamaClient:
                 timeout=(self.CONNECTION_TIMEOUT, self.STREAM_TIMEOUT)
             )
             
-            full_response = ""
+            # Ollama streams one JSON object per line; tolerate SSE-style
+            # "data: " prefixes from compatible proxies as well.
+            chunks = []
             for line in response.iter_lines():
-                if line:
-                    decoded_line = line.decode('utf-8')
-                    if decoded_line.startswith('data: '):
-                        data_str = decoded_line[6:].strip()
-                        if data_str == '[DONE]':
-                            break
-                        try:
-                            data = json.loads(data_str)
-                            if isinstance(data, dict):
-                                text = data.get('response', '')
-                                if text:
-                                    full_response += text
-                                    if callable(callback):
-                                        callback(text)
-                        except json.JSONDecodeError:
-                            continue
+                if not line:
+                    continue
+                data_str = line.decode('utf-8').strip()
+                if data_str.startswith('data: '):
+                    data_str = data_str[6:].strip()
+                if data_str == '[DONE]':
+                    break
+                try:
+                    data = json.loads(data_str)
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(data, dict):
+                    continue
+                text = data.get('response', '')
+                if text:
+                    chunks.append(text)
+                    if callable(callback):
+                        callback(text)
+                if data.get('done'):
+                    break
             
-            return full_response
+            self._track_performance('generate_stream', True, time.time() - start_time, len(prompt))
+            return "".join(chunks)
             
         except Exception as e:
+            self._track_performance('generate_stream', False, time.time() - start_time, len(prompt))
             raise RuntimeError(f"Streaming request failed: {e}")
+        finally:
+            self._active_requests -= 1
     
     def _get_cache_key(self, prompt: str, method: str = "generate") -> str:
         """Generate a cache key for the given prompt"""
@@ -371,11 +407,16 @@ class OllamaClient:
         
         return self._generate_response(prompt)
 
-    def analyze_strategy_with_backtest_contract(self, strategy_code: str, backtest_result: Dict) -> str:
-        if not isinstance(backtest_result, dict):
+    def _build_backtest_contract_prompt(
+        self, strategy_code: str, backtest_result: Dict, payload_json: Optional[str | bytes] = None
+    ) -> str:
+        if payload_json is not None:
+            # Caller already serialized backtest_result (off the UI thread).
+            backtest_json = payload_json.decode("utf-8") if isinstance(payload_json, bytes) else str(payload_json)
+        elif not isinstance(backtest_result, dict):
             raise ValueError("Invalid backtest result format")
-
-        backtest_json = json.dumps(backtest_result, indent=2, ensure_ascii=False)
+        else:
+            backtest_json = json_codec.dumps(backtest_result, indent=True)
 
         kb_context = self._build_kb_context(
             "contract strategy review\n" + (strategy_code or "")[:2000] + "\n" + backtest_json[:2000]
@@ -447,13 +488,54 @@ Backtest JSON:
 {backtest_json}
 """
 
+        return prompt
+
+    def analyze_strategy_with_backtest_contract(
+        self, strategy_code: str, backtest_result: Dict, payload_json: Optional[str | bytes] = None
+    ) -> str:
+        prompt = self._build_backtest_contract_prompt(strategy_code, backtest_result, payload_json)
         return self._generate_response(prompt)
 
+    def analyze_strategy_with_backtest_contract_stream(
+        self,
+        strategy_code: str,
+        backtest_result: Dict,
+        callback: callable,
+        payload_json: Optional[str | bytes] = None,
+    ) -> str:
+        """Streaming variant: callback receives each text chunk as it is generated."""
+        prompt = self._build_backtest_contract_prompt(strategy_code, backtest_result, payload_json)
+        received = False
+
+        def _on_chunk(chunk: str) -> None:
+            nonlocal received
+            received = True
+            callback(chunk)
+
+        # The stream has no retries or request queue of its own. At the
+        # concurrency limit, or when it fails before the first chunk, the
+        # buffered _generate_response path takes over; the whole answer then
+        # reaches the callback as one chunk.
+        text = None
+        if self._can_make_request():
+            try:
+                text = self.generate_text_stream(prompt, _on_chunk)
+            except RuntimeError as e:
+                if received:
+                    raise
+                logger.warning(f"Ollama stream failed before the first chunk, retrying without streaming: {e}")
+        if text is None:
+            text = self._generate_response(prompt, use_cache=False)
+            callback(text)
+        if not text.strip():
+            raise RuntimeError("Ollama returned empty response")
+        return text
+
     def analyze_strategy_with_scenarios(self, strategy_code: str, scenarios_payload: Dict) -> str:
         if not isinstance(scenarios_payload, dict):
             raise ValueError("Invalid scenarios payload format")
 
-        payload_json = json.dumps(scenarios_payload, indent=2, ensure_ascii=False)
+        payload_json = json_codec.dumps(scenarios_payload, indent=True)
 
         kb_context = self._build_kb_context(
             "strategy scenario analysis\n" + (strategy_code or "")[:2000] + "\n" + payload_json[:2000]
@@ -496,7 +578,7 @@ Scenarios JSON:
         if not isinstance(scenarios_payload, dict):
             raise ValueError("Invalid scenarios payload format")
 
-        payload_json = json.dumps(scenarios_payload, indent=2, ensure_ascii=False)
+        payload_json = json_codec.dumps(scenarios_payload, indent=True)
 
         kb_context = self._build_kb_context(
             "scenario risk assessment\n" + (strategy_code or "")[:2000] + "\n" + payload_json[:2000]
@@ -537,7 +619,7 @@ Scenarios JSON:
         if not isinstance(backtest_result, dict):
             raise ValueError("Invalid backtest result format")
 
-        backtest_json = json.dumps(backtest_result, indent=2, ensure_ascii=False)
+        backtest_json = json_codec.dumps(backtest_result, indent=True)
 
         kb_context = self._build_kb_context(
             "risk assessment\n" + (strategy_code or "")[:2000] + "\n" + backtest_json[:2000]
@@ -583,16 +665,12 @@ Backtest JSON:
         goal = (user_goal or "").strip()
         strategy_class = "AIStrategy"
         try:
-            m = re.search(
-                r"^\s*class\s+([A-Za-z_][A-Za-z0-9_]*)\s*\(.*IStrategy.*\)\s*:\s*$",
-                str(current_strategy_code or ""),
-                flags=re.MULTILINE,
-            )
+            m = _STRATEGY_CLASS_RE.search(str(current_strategy_code or ""))
             if m:
                 strategy_class = str(m.group(1) or "").strip() or strategy_class
         except Exception:
             strategy_class = "AIStrategy"
-        backtest_json = json.dumps(backtest_result, indent=2, ensure_ascii=False)
+        backtest_json = json_codec.dumps(backtest_result, indent=True)
 
         kb_context = self._build_kb_context(
             "strategy refinement\n" + (goal or "") + "\n" + (current_strategy_code or "")[:2000] + "\n" + backtest_json[:2000]
@@ -666,11 +744,7 @@ Backtest summary + forensics JSON:
     def repair_strategy_code(self, user_idea: str, broken_code: str, error: str) -> str:
         strategy_class = "AIStrategy"
         try:
-            m = re.search(
-                r"^\s*class\s+([A-Za-z_][A-Za-z0-9_]*)\s*\(.*IStrategy.*\)\s*:\s*$",
-                str(broken_code or ""),
-                flags=re.MULTILINE,
-            )
+            m = _STRATEGY_CLASS_RE.search(str(broken_code or ""))
             if m:
                 strategy_class = str(m.group(1) or "").strip() or strategy_class
         except Exception:
@@ -714,7 +788,7 @@ Broken code:
         if not isinstance(backtest_result, dict):
             raise ValueError("Invalid backtest result format")
 
-        backtest_json = json.dumps(backtest_result, indent=2, ensure_ascii=False)
+        backtest_json = json_codec.dumps(backtest_result, indent=True)
 
         kb_context = self._build_kb_context(
             "strategy backtest analysis\n" + (strategy_code or "")[:2000] + "\n" + backtest_json[:2000]
@@ -864,7 +938,7 @@ User idea:
         if not isinstance(performance_metrics, dict):
             raise ValueError("performance_metrics must be a dict")
 
-        metrics_json = json.dumps(performance_metrics, indent=2, ensure_ascii=False)
+        metrics_json = json_codec.dumps(performance_metrics, indent=True)
 
         kb_context = self._build_kb_context(
             "contract improvements\n" + (current_strategy or "")[:2000] + "\n" + metrics_json[:2000]
@@ -8,12 +8,14 @@ class WorkerSignals(QObject):
 
 
 class Worker(QRunnable):
-    def __init__(self, fn, *args, **kwargs):
+    def __init__(self, fn, *args, signals: WorkerSignals | None = None, **kwargs):
         super().__init__()
         self.fn = fn
         self.args = args
         self.kwargs = kwargs
-        self.signals = WorkerSignals()
+        # A long-lived, already connected WorkerSignals may be passed in so
+        # repeated jobs of the same kind do not rewire their slots each time.
+        self.signals = signals if signals is not None else WorkerSignals()
 
     @pyqtSlot()
     def run(self):